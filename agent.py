@@ -1,83 +1,181 @@
 import logging
+import sys
+from collections import deque
+from functools import wraps
+
+from message_handler import Message
 from utils.logging_config import setup_logger, log_with_agent_id
 
 logger = setup_logger(__name__)
 
+_NO_BUS_MSG = "No message bus available to send message"
+_REQUIRED_FIELDS = frozenset(("sender", "recipient", "task"))
+# Messages handed over with an explicit recipient (broadcasts) need not carry one
+_ADDRESSED_FIELDS = frozenset(("sender", "task"))
+_PING = sys.intern("ping")
+_PROCESS_DATA = sys.intern("process_data")
 
-class Agent:
-    def __init__(self, agent_id, message_bus=None, max_context=100):
-        self.agent_id = agent_id
-        self.context = []
-        self._max_context = max_context
-        self.message_bus = message_bus
-        self.task_routes = {
-            "ping": self.handle_ping,
-            "process_data": self.handle_process_data,
-        }
 
-    def send_message(self, recipient, task, payload):
-        if not self.message_bus:
-            raise RuntimeError("No message bus available to send message")
-        self.message_bus.deliver(
-            {
-                "sender": self.agent_id,
-                "recipient": recipient,
-                "task": task,
-                "payload": payload,
-            }
-        )
+def fault_tolerant(handler):
+    """Log exceptions raised by a task handler instead of propagating them.
 
-    def receive_message(self, message):
-        if not all(field in message for field in ("sender", "recipient", "task")):
-            log_with_agent_id(
-                logger,
-                self.agent_id,
-                logging.WARNING,
-                f"Invalid message format: {message}",
+    Only handlers that can fail on untrusted payloads need this; the built-in
+    ping/process_data handlers are dispatched without a guard.
+    """
+
+    @wraps(handler)
+    def guarded(self, sender, payload):
+        try:
+            return handler(self, sender, payload)
+        except Exception as e:
+            error_type = (
+                "Invalid data" if isinstance(e, (ValueError, TypeError)) else "Error"
             )
-            return
-        if message["recipient"] != self.agent_id:
             log_with_agent_id(
                 logger,
                 self.agent_id,
-                logging.WARNING,
-                f"Message not for this agent: {message['recipient']}",
+                logging.ERROR,
+                "%s in %s: %s",
+                error_type,
+                handler.__name__,
+                e,
             )
-            return
 
-        self.context.append(message)
-        if len(self.context) > self._max_context:
-            self.context = self.context[-self._max_context :]
+    return guarded
 
-        task, payload, sender = (
-            message["task"],
-            message.get("payload", {}),
-            message["sender"],
-        )
-        log_with_agent_id(
-            logger,
-            self.agent_id,
-            logging.INFO,
-            f"received task '{task}' from {sender} with payload: {payload}",
-        )
 
-        if handler := self.task_routes.get(task):
-            try:
-                handler(sender, payload)
-            except Exception as e:
-                error_type = (
-                    "Invalid data"
-                    if isinstance(e, (ValueError, TypeError))
-                    else "Error"
+class Agent:
+    __slots__ = (
+        "agent_id",
+        "context",
+        "task_routes",
+        "_message_bus",
+        "_deliver",
+        "_deliver_many",
+        "_ctx_append",
+        "_route_get",
+    )
+
+    # Shared by every pong reply; receivers must treat it as read-only.
+    _PONG_PAYLOAD = {"status": "alive"}
+
+    def __init__(
+        self, agent_id, message_bus=None, max_context=100, store_context=False
+    ):
+        # Interned so id comparisons on the hot path are pointer checks;
+        # sys.intern only accepts exact str, so other ids are kept as given
+        self.agent_id = sys.intern(agent_id) if type(agent_id) is str else agent_id
+        # Context is opt-in: stateless agents (routers, ping responders) would
+        # otherwise hold a reference to every message they have handled.
+        self.context = deque(maxlen=max_context if store_context else 0)
+        self._ctx_append = self.context.append if store_context else None
+        self.message_bus = message_bus
+        self.task_routes = {
+            _PING: self.handle_ping,
+            _PROCESS_DATA: self.handle_process_data,
+        }
+        # Subclasses extend task_routes in place, so the bound lookup stays valid.
+        self._route_get = self.task_routes.get
+
+    @property
+    def message_bus(self):
+        return self._message_bus
+
+    @message_bus.setter
+    def message_bus(self, bus):
+        # The bus's delivery methods are bound once here rather than looked
+        # up on every send.
+        self._message_bus = bus
+        self._deliver = bus.deliver if bus else None
+        self._deliver_many = getattr(bus, "deliver_many", None) if bus else None
+
+    def send_message(self, recipient, task, payload, record=True):
+        # Outgoing messages join the context (when stored) so it holds both
+        # sides of the conversation; record=False is for transient traffic.
+        if self._deliver is None:
+            raise RuntimeError(_NO_BUS_MSG)
+        message = Message(self.agent_id, recipient, task, payload)
+        if record and self._ctx_append is not None:
+            self._ctx_append(message)
+        self._deliver(message)
+
+    def send_messages(self, batch):
+        if self._deliver is None:
+            raise RuntimeError(_NO_BUS_MSG)
+        sender = self.agent_id
+        messages = [Message(sender, r, t, p) for r, t, p in batch]
+        if self._ctx_append is not None:
+            self.context.extend(messages)
+        if self._deliver_many is not None:
+            self._deliver_many(messages)
+        else:
+            for message in messages:
+                self._deliver(message)
+
+    def receive_message(self, message, recipient=None):
+        self.receive_messages((message,), recipient)
+
+    def receive_messages(self, messages, recipient=None):
+        # When recipient is given it overrides each message's own recipient,
+        # letting a broadcast hand every agent the same shared message object.
+        # Per-batch invariants are hoisted so a bus draining a backlog pays
+        # for the attribute lookups once rather than once per message.
+        agent_id = self.agent_id
+        ctx_append = self._ctx_append
+        route_get = self._route_get
+        log_info = logger.isEnabledFor(logging.INFO)
+        required = _REQUIRED_FIELDS if recipient is None else _ADDRESSED_FIELDS
+
+        for message in messages:
+            if not isinstance(message, Message):
+                if not required <= message.keys():
+                    log_with_agent_id(
+                        logger,
+                        agent_id,
+                        logging.WARNING,
+                        "Invalid message format: %s",
+                        message,
+                    )
+                    continue
+                task = message["task"]
+                # Tasks decoded from external input are fresh strings; interning
+                # them lets the route lookup hit on identity.
+                message = Message(
+                    message["sender"],
+                    message["recipient"] if recipient is None else recipient,
+                    sys.intern(task) if type(task) is str else task,
+                    message.get("payload", {}),
                 )
+            target = message.recipient if recipient is None else recipient
+            if target != agent_id:
                 log_with_agent_id(
                     logger,
-                    self.agent_id,
-                    logging.ERROR,
-                    f"{error_type} in task '{task}': {e}",
+                    agent_id,
+                    logging.WARNING,
+                    "Message not for this agent: %s",
+                    target,
                 )
-        else:
-            self.handle_unknown_task(task, payload)
+                continue
+
+            if ctx_append is not None:
+                ctx_append(message)
+
+            task, payload, sender = message.task, message.payload, message.sender
+            if log_info:
+                log_with_agent_id(
+                    logger,
+                    agent_id,
+                    logging.INFO,
+                    "received task '%s' from %s with payload: %s",
+                    task,
+                    sender,
+                    payload,
+                )
+
+            if handler := route_get(task):
+                handler(sender, payload)
+            else:
+                self.handle_unknown_task(task, payload)
 
     def handle_ping(self, sender, payload):
         if sender == self.agent_id:
@@ -85,7 +183,7 @@ class Agent:
                 logger, self.agent_id, logging.INFO, "Task sent to self, ignoring."
             )
             return
-        self.send_message(sender, "pong", {"status": "alive"})
+        self.send_message(sender, "pong", self._PONG_PAYLOAD)
 
     def handle_process_data(self, sender, payload):
         self.send_message(
@@ -93,8 +191,11 @@ class Agent:
         )
 
     def handle_unknown_task(self, task, payload):
-        log_with_agent_id(logger, self.agent_id, logging.INFO, f"Unknown task: {task}")
+        log_with_agent_id(logger, self.agent_id, logging.INFO, "Unknown task: %s", task)
 
     def process_data(self, payload):
-        item_count = len(payload) if isinstance(payload, (list, tuple, dict)) else 0
+        try:
+            item_count = len(payload)
+        except TypeError:
+            item_count = 0
         return {"summary": f"Processed {item_count} items"}
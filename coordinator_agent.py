@@ -1,21 +1,27 @@
 import logging
-from agent import Agent
+import sys
+from agent import Agent, fault_tolerant
 from utils.logging_config import setup_logger, log_with_agent_id
 
 logger = setup_logger(__name__)
 
+_HANDLE_REQUEST = sys.intern("handle_request")
+
 
 class CoordinatorAgent(Agent):
+    __slots__ = ()
+
     def __init__(self, agent_id, message_bus):
         super().__init__(agent_id, message_bus)
-        self.task_routes["handle_request"] = self.handle_request
+        self.task_routes[_HANDLE_REQUEST] = self.handle_request
 
+    @fault_tolerant
     def handle_request(self, sender, payload):
         log_with_agent_id(
-            logger, self.agent_id, logging.INFO, f"Received user request: {payload}"
+            logger, self.agent_id, logging.INFO, "Received user request: %s", payload
         )
-        for subtask in self.decompose_request(payload):
-            self.send_message(subtask["agent"], subtask["task"], subtask["payload"])
+        self.send_messages(self.decompose_request(payload))
 
     def decompose_request(self, payload):
-        return [{"agent": "research_agent", "task": "process_data", "payload": payload}]
+        # Yields (agent, task, payload) tuples consumed directly by send_messages.
+        yield "research_agent", "process_data", payload
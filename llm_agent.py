@@ -3,19 +3,223 @@ LLM-Enhanced Agent for Multi-Agent System
 Provides agents with LLM reasoning capabilities.
 """
 
+import asyncio
+import hashlib
 import json
-from typing import Dict, List, Any, Optional
-from agent import Agent
-from utils.llm_interface import create_llm_interface, LLMInterface
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Sequence
+from agent import Agent, fault_tolerant
+from message_handler import Message
+from utils.llm_batcher import LLMBatcher
+from utils.llm_cache import LLMCache
+from utils.llm_interface import (
+    create_llm_interface,
+    estimate_tokens,
+    ErrorResponse,
+    LLMInterface,
+)
 from utils.logging_config import log_with_agent_id
 import logging
 
 logger = logging.getLogger(__name__)
 
+# llm_config keys forwarded to the LLM interface; the rest configure the agent.
+_INTERFACE_KEYS = ("model_name", "temperature")
+
+# Shared by every agent so provider calls from async callers never block the
+# event loop; calls are I/O-bound HTTP, so threads rather than processes.
+_LLM_POOL = ThreadPoolExecutor(
+    max_workers=int(os.getenv("LLM_POOL", 32)), thread_name_prefix="llm"
+)
+
+
+# Batchers (and the interface they drive) shared by every agent with the same
+# provider, interface settings and batch window, so a fan-out to several
+# agents in the same tick coalesces into one batch.
+_BATCHERS: Dict[tuple, LLMBatcher] = {}
+_BATCHERS_LOCK = threading.Lock()
+
+
+def _shared_batcher(
+    provider: str, interface_kwargs: Dict, window_ms: float, max_batch: int
+) -> LLMBatcher:
+    key = (provider, tuple(sorted(interface_kwargs.items())), window_ms, max_batch)
+    with _BATCHERS_LOCK:
+        batcher = _BATCHERS.get(key)
+        if batcher is None:
+            batcher = _BATCHERS[key] = LLMBatcher(
+                create_llm_interface(provider=provider, **interface_kwargs),
+                window_ms=window_ms,
+                max_batch=max_batch,
+            )
+        return batcher
+
+
+def _item_count(data: Any) -> int:
+    return len(data) if isinstance(data, (list, dict)) else 0
+
+
+def _make_handler(name: str, spec: Dict) -> Any:
+    """Build the handle_<name> method described by a HANDLER_SPECS entry.
+
+    Spec keys:
+      fields   - {name: (payload key, default)}; a callable default is called
+                 so each message gets a fresh container
+      json     - field names also rendered as compact JSON into <name>_json
+      template - prompt template, formatted with the fields
+      context  - optional payload key holding conversation context
+      reply    - task of the reply message; result is the key for the output
+      echo     - {reply key: field name} copied into the reply
+      derived  - {reply key: (field name, function)} computed for the reply
+    """
+    fields = tuple(
+        (field, key, default) for field, (key, default) in spec["fields"].items()
+    )
+    json_fields = tuple(spec.get("json", ()))
+    template = spec["template"]
+    context_key = spec.get("context")
+    reply, result_key = spec["reply"], spec["result"]
+    echo = tuple(spec.get("echo", {}).items())
+    derived = tuple(
+        (out, field, fn) for out, (field, fn) in spec.get("derived", {}).items()
+    )
+
+    def handler(self, sender: str, payload: Dict) -> None:
+        values = {}
+        for field, key, default in fields:
+            if key in payload:
+                values[field] = payload[key]
+            else:
+                values[field] = default() if callable(default) else default
+        for field in json_fields:
+            values[f"{field}_json"] = json.dumps(values[field], separators=(",", ":"))
+
+        result = self.llm_reason(
+            template.format_map(values),
+            payload.get(context_key, []) if context_key else None,
+            stream_to=sender if payload.get("stream") else None,
+        )
+
+        response = {result_key: result}
+        for out, field in echo:
+            response[out] = values[field]
+        for out, field, fn in derived:
+            response[out] = fn(values[field])
+        self.send_message(sender, reply, response)
+
+    handler.__name__ = f"handle_{name}"
+    handler.__doc__ = spec.get("doc")
+    return fault_tolerant(handler)
+
 
 class LLMAgent(Agent):
     """Agent enhanced with LLM reasoning capabilities."""
 
+    # Data-bearing templates lead with the payload so requests over the same
+    # data share a cacheable prefix regardless of the instruction that follows.
+    _ANALYZE_TMPL = (
+        "Data: {data_json}\n\n"
+        "Please analyze the data above for {analysis_type} analysis.\n\n"
+        "Provide insights, patterns, and recommendations."
+    )
+
+    _REASON_TMPL = (
+        "Please help me reason about this problem:\n\n"
+        "Problem: {problem}\n\n"
+        "Consider the context and provide a thoughtful analysis with possible solutions."
+    )
+
+    _GENERATE_TMPL = (
+        "Please generate {content_type} content with the following requirements:\n\n"
+        "Requirements: {requirements}\n\n"
+        "Generate high-quality, relevant content."
+    )
+
+    _SUMMARIZE_TMPL = (
+        "Please provide a {summary_type} summary of the following content:\n\n"
+        "Content: {content}\n\n"
+        "Create a concise, informative summary."
+    )
+
+    _PLAN_TMPL = (
+        "Please create a detailed plan to achieve this goal:\n\n"
+        "Goal: {goal}\n"
+        "Constraints: {constraints}\n\n"
+        "Provide a step-by-step plan with timelines and resources needed."
+    )
+
+    # Task name -> handler spec (see _make_handler). Subclasses declare only
+    # their own entries; specs are merged down the class hierarchy.
+    HANDLER_SPECS = {
+        "analyze": {
+            "doc": "Analyze data using LLM.",
+            "fields": {"data": ("data", dict), "analysis_type": ("type", "general")},
+            "json": ("data",),
+            "template": _ANALYZE_TMPL,
+            "reply": "analysis_complete",
+            "result": "analysis",
+            "echo": {"original_data": "data", "analysis_type": "analysis_type"},
+        },
+        "reason": {
+            "doc": "Use LLM for reasoning about a problem.",
+            "fields": {"problem": ("problem", "")},
+            "template": _REASON_TMPL,
+            "context": "context",
+            "reply": "reasoning_complete",
+            "result": "reasoning",
+            "echo": {"original_problem": "problem"},
+        },
+        "generate": {
+            "doc": "Generate content using LLM.",
+            "fields": {
+                "content_type": ("type", "text"),
+                "requirements": ("requirements", ""),
+            },
+            "template": _GENERATE_TMPL,
+            "reply": "generation_complete",
+            "result": "content",
+            "echo": {"content_type": "content_type", "requirements": "requirements"},
+        },
+        "summarize": {
+            "doc": "Summarize content using LLM.",
+            "fields": {
+                "content": ("content", ""),
+                "summary_type": ("summary_type", "general"),
+            },
+            "template": _SUMMARIZE_TMPL,
+            "reply": "summary_complete",
+            "result": "summary",
+            "echo": {"summary_type": "summary_type"},
+            "derived": {"original_length": ("content", len)},
+        },
+        "plan": {
+            "doc": "Create a plan using LLM.",
+            "fields": {"goal": ("goal", ""), "constraints": ("constraints", list)},
+            "template": _PLAN_TMPL,
+            "reply": "plan_complete",
+            "result": "plan",
+            "echo": {"goal": "goal", "constraints": "constraints"},
+        },
+    }
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._install_handlers()
+
+    @classmethod
+    def _install_handlers(cls) -> None:
+        """Generate handle_<task> methods for the class's own HANDLER_SPECS."""
+        own = cls.__dict__.get("HANDLER_SPECS", {})
+        for name, spec in own.items():
+            # A hand-written handler on the class takes precedence
+            if f"handle_{name}" not in cls.__dict__:
+                setattr(cls, f"handle_{name}", _make_handler(name, spec))
+        inherited = getattr(super(cls, cls), "HANDLER_SPECS", {})
+        cls.HANDLER_SPECS = {**inherited, **own}
+
     def __init__(
         self,
         agent_id: str,
@@ -23,185 +227,251 @@ class LLMAgent(Agent):
         max_context=100,
         llm_provider: str = "mock",
         llm_config: Dict = None,
+        store_context: bool = False,
     ):
-        super().__init__(agent_id, message_bus, max_context)
+        super().__init__(agent_id, message_bus, max_context, store_context)
 
         # Initialize LLM
         self.llm_config = llm_config or {}
-        self.llm = create_llm_interface(provider=llm_provider, **self.llm_config)
+        interface_kwargs = {
+            k: v for k, v in self.llm_config.items() if k in _INTERFACE_KEYS
+        }
+        # Opt-in request coalescing: agents configured alike share one batcher
+        # and its interface, so concurrent calls across agents batch together
+        batch_window_ms = self.llm_config.get("batch_window_ms")
+        if batch_window_ms is not None:
+            self._batcher = _shared_batcher(
+                llm_provider,
+                interface_kwargs,
+                batch_window_ms,
+                self.llm_config.get("max_batch", 32),
+            )
+            self.llm = self._batcher.llm
+        else:
+            self._batcher = None
+            self.llm = create_llm_interface(provider=llm_provider, **interface_kwargs)
+
+        # Response cache: cache_mode is "exact" (default) or "off"; replies
+        # are only cached while the interface samples at temperature 0
+        cache_mode = self.llm_config.get("cache_mode", "exact")
+        if cache_mode not in ("exact", "off"):
+            raise ValueError(
+                f"Unknown cache mode: {cache_mode}. Available: ['exact', 'off']"
+            )
+        self._resp_cache = (
+            LLMCache(
+                max_entries=self.llm_config.get("cache_size", 512),
+                ttl=self.llm_config.get("cache_ttl"),
+                path=self.llm_config.get("cache_path"),
+            )
+            if cache_mode == "exact"
+            else None
+        )
+
+        # Token budget for conversation context in llm_reason; defaults to a
+        # quarter of the interface's max_tokens when unset
+        self.context_token_budget = self.llm_config.get("context_token_budget")
+
+        # Caps this agent's in-flight llm_reason_async calls (provider rate
+        # limits); asyncio semaphores bind to one loop, so one per loop
+        self.max_concurrency = self.llm_config.get("max_concurrency", 8)
+        self._llm_slots = weakref.WeakKeyDictionary()
 
         # Enhanced task routes with LLM capabilities
         self.task_routes.update(
-            {
-                "analyze": self.handle_analyze,
-                "reason": self.handle_reason,
-                "generate": self.handle_generate,
-                "summarize": self.handle_summarize,
-                "plan": self.handle_plan,
-            }
+            {name: getattr(self, f"handle_{name}") for name in self.HANDLER_SPECS}
         )
 
         # Agent personality and capabilities
         self.personality = self.llm_config.get(
             "personality", "You are a helpful AI assistant."
         )
-        self.capabilities = self.llm_config.get(
-            "capabilities",
-            ["data analysis", "text generation", "reasoning", "planning"],
+        self.capabilities = tuple(
+            self.llm_config.get(
+                "capabilities",
+                ["data analysis", "text generation", "reasoning", "planning"],
+            )
         )
 
-    def llm_reason(self, prompt: str, context: List[Dict] = None) -> str:
-        """Use LLM for reasoning."""
-        try:
-            # Prepare context for LLM
-            messages = []
+        # Built once so every request starts with a byte-identical prefix,
+        # which is what provider-side prompt caching keys on.
+        self._system_message = {
+            "role": "system",
+            "content": f"{self.personality}\n\nYour capabilities: {', '.join(self.capabilities)}".rstrip(),
+        }
 
-            # Add system message with personality and capabilities
-            system_msg = f"{self.personality}\n\nYour capabilities: {', '.join(self.capabilities)}"
-            messages.append({"role": "system", "content": system_msg})
+    def llm_reason(
+        self, prompt: str, context: Sequence = None, stream_to: str = None
+    ) -> str:
+        """Use LLM for reasoning.
 
-            # Add conversation context if provided
+        When stream_to is set, each generated chunk is forwarded to that agent
+        as a "partial" message before the full response is returned.
+        """
+        try:
+            # Invariant system prefix first, variable turns strictly after it
+            messages = [self._system_message]
+
+            # Add conversation context if provided, one message per turn:
+            # the most recent turns that fit within the context token budget
             if context:
-                for msg in context[-5:]:  # Last 5 messages for context
-                    role = "user" if msg.get("sender") != self.agent_id else "assistant"
-                    content = f"Task: {msg.get('task', '')}\nPayload: {msg.get('payload', {})}"
-                    messages.append({"role": role, "content": content})
+                budget = self.context_token_budget
+                if budget is None:
+                    budget = self.llm.max_tokens // 4
+                turns = []
+                for msg in reversed(context):
+                    if isinstance(msg, Message):
+                        sender, task, payload = msg.sender, msg.task, msg.payload
+                    else:
+                        sender = msg.get("sender")
+                        task = msg.get("task", "")
+                        payload = msg.get("payload", {})
+                    payload = json.dumps(payload, sort_keys=True, default=str)
+                    content = f"Task: {task}\nPayload: {payload}"
+                    budget -= estimate_tokens(content)
+                    if budget < 0:
+                        break
+                    role = "user" if sender != self.agent_id else "assistant"
+                    turns.append({"role": role, "content": content})
+                messages.extend(reversed(turns))
 
             # Add current prompt
             messages.append({"role": "user", "content": prompt})
 
+            # Serve repeated prompts from the response cache; sampled replies
+            # differ between calls, so only deterministic ones are reused
+            cache_key = None
+            if self._resp_cache is not None and self.llm.temperature == 0:
+                # Hash the already-rendered messages piecewise instead of
+                # concatenating them or repr()-ing raw context payloads.
+                digest = hashlib.blake2b(digest_size=16)
+                digest.update(
+                    f"{self.llm.model_name}\0{self.llm.temperature}\0".encode()
+                )
+                for message in messages:
+                    digest.update(message["role"].encode())
+                    digest.update(b"\0")
+                    digest.update(message["content"].encode())
+                    digest.update(b"\0")
+                cache_key = digest.digest()
+                if (cached := self._resp_cache.get(cache_key)) is not None:
+                    if stream_to is not None:
+                        # Streaming requesters still get their partial(s)
+                        self.send_message(
+                            stream_to,
+                            "partial",
+                            {"chunk": cached, "seq": 0},
+                            record=False,
+                        )
+                    return cached
+
             # Generate response
-            response = self.llm.generate_with_context(messages)
+            if stream_to is None:
+                response = (
+                    self._batcher.submit(messages)
+                    if self._batcher is not None
+                    else self.llm.generate_with_context(messages)
+                )
+                failed = isinstance(response, ErrorResponse)
+            else:
+                chunks = []
+                failed = False
+                for seq, chunk in enumerate(self.llm.stream(messages)):
+                    chunks.append(chunk)
+                    failed = failed or isinstance(chunk, ErrorResponse)
+                    # Chunks are transient and stay out of the context history
+                    self.send_message(
+                        stream_to,
+                        "partial",
+                        {"chunk": chunk, "seq": seq},
+                        record=False,
+                    )
+                response = "".join(chunks)
+            # Failed calls are reported as text; never cache them as the answer
+            if cache_key is not None and not failed:
+                self._resp_cache.set(cache_key, response)
             return response
 
         except Exception as e:
             log_with_agent_id(
-                logger, self.agent_id, logging.ERROR, f"LLM reasoning error: {e}"
+                logger, self.agent_id, logging.ERROR, "LLM reasoning error: %s", e
             )
             return f"Error in reasoning: {e}"
 
-    def handle_analyze(self, sender: str, payload: Dict) -> None:
-        """Analyze data using LLM."""
-        data = payload.get("data", {})
-        analysis_type = payload.get("type", "general")
-
-        prompt = f"""
-        Please analyze the following data for {analysis_type} analysis:
-        
-        Data: {json.dumps(data, indent=2)}
-        
-        Provide insights, patterns, and recommendations.
-        """
-
-        analysis = self.llm_reason(prompt)
-
-        # Send analysis results back
-        self.send_message(
-            sender,
-            "analysis_complete",
-            {
-                "analysis": analysis,
-                "original_data": data,
-                "analysis_type": analysis_type,
-            },
-        )
-
-    def handle_reason(self, sender: str, payload: Dict) -> None:
-        """Use LLM for reasoning about a problem."""
-        problem = payload.get("problem", "")
-        context = payload.get("context", [])
-
-        prompt = f"""
-        Please help me reason about this problem:
-        
-        Problem: {problem}
-        
-        Consider the context and provide a thoughtful analysis with possible solutions.
-        """
+    async def llm_reason_async(
+        self, prompt: str, context: Sequence = None, stream_to: str = None
+    ) -> str:
+        """Run llm_reason on the shared LLM pool without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        slots = self._llm_slots.get(loop)
+        if slots is None:
+            slots = self._llm_slots[loop] = asyncio.Semaphore(self.max_concurrency)
+        async with slots:
+            return await loop.run_in_executor(
+                _LLM_POOL, self.llm_reason, prompt, context, stream_to
+            )
 
-        reasoning = self.llm_reason(prompt, context)
 
-        self.send_message(
-            sender,
-            "reasoning_complete",
-            {"reasoning": reasoning, "original_problem": problem},
-        )
+LLMAgent._install_handlers()
 
-    def handle_generate(self, sender: str, payload: Dict) -> None:
-        """Generate content using LLM."""
-        content_type = payload.get("type", "text")
-        requirements = payload.get("requirements", "")
-
-        prompt = f"""
-        Please generate {content_type} content with the following requirements:
-        
-        Requirements: {requirements}
-        
-        Generate high-quality, relevant content.
-        """
 
-        generated_content = self.llm_reason(prompt)
+class ResearchAgent(LLMAgent):
+    """Specialized research agent with enhanced analysis capabilities."""
 
-        self.send_message(
-            sender,
-            "generation_complete",
-            {
-                "content": generated_content,
-                "content_type": content_type,
-                "requirements": requirements,
+    _RESEARCH_TMPL = (
+        "Please conduct {depth} research on the following topic:\n\n"
+        "Topic: {topic}\n\n"
+        "Provide comprehensive information, key findings, and relevant sources."
+    )
+
+    _SYNTHESIZE_TMPL = (
+        "Sources: {sources_json}\n\n"
+        "Please synthesize information from the sources above.\n\n"
+        "Provide a {synthesis_type} synthesis that identifies patterns, contradictions, and insights."
+    )
+
+    _TREND_TMPL = (
+        "Data: {data_json}\n\n"
+        "Please analyze trends in the data above over {time_period}.\n\n"
+        "Identify patterns, trends, and potential future developments."
+    )
+
+    HANDLER_SPECS = {
+        "research": {
+            "doc": "Conduct research on a topic.",
+            "fields": {"topic": ("topic", ""), "depth": ("depth", "moderate")},
+            "template": _RESEARCH_TMPL,
+            "reply": "research_complete",
+            "result": "results",
+            "echo": {"topic": "topic", "depth": "depth"},
+        },
+        "synthesize": {
+            "doc": "Synthesize information from multiple sources.",
+            "fields": {
+                "sources": ("sources", list),
+                "synthesis_type": ("type", "comprehensive"),
             },
-        )
-
-    def handle_summarize(self, sender: str, payload: Dict) -> None:
-        """Summarize content using LLM."""
-        content = payload.get("content", "")
-        summary_type = payload.get("summary_type", "general")
-
-        prompt = f"""
-        Please provide a {summary_type} summary of the following content:
-        
-        Content: {content}
-        
-        Create a concise, informative summary.
-        """
-
-        summary = self.llm_reason(prompt)
-
-        self.send_message(
-            sender,
-            "summary_complete",
-            {
-                "summary": summary,
-                "summary_type": summary_type,
-                "original_length": len(content),
+            "json": ("sources",),
+            "template": _SYNTHESIZE_TMPL,
+            "reply": "synthesis_complete",
+            "result": "synthesis",
+            "echo": {"synthesis_type": "synthesis_type"},
+            "derived": {"source_count": ("sources", len)},
+        },
+        "trend_analysis": {
+            "doc": "Analyze trends in data.",
+            "fields": {
+                "data": ("data", dict),
+                "time_period": ("time_period", "recent"),
             },
-        )
-
-    def handle_plan(self, sender: str, payload: Dict) -> None:
-        """Create a plan using LLM."""
-        goal = payload.get("goal", "")
-        constraints = payload.get("constraints", [])
-
-        prompt = f"""
-        Please create a detailed plan to achieve this goal:
-        
-        Goal: {goal}
-        Constraints: {constraints}
-        
-        Provide a step-by-step plan with timelines and resources needed.
-        """
-
-        plan = self.llm_reason(prompt)
-
-        self.send_message(
-            sender,
-            "plan_complete",
-            {"plan": plan, "goal": goal, "constraints": constraints},
-        )
-
-
-class ResearchAgent(LLMAgent):
-    """Specialized research agent with enhanced analysis capabilities."""
+            "json": ("data",),
+            "template": _TREND_TMPL,
+            "reply": "trend_analysis_complete",
+            "result": "analysis",
+            "echo": {"time_period": "time_period"},
+            "derived": {"data_points": ("data", _item_count)},
+        },
+    }
 
     def __init__(self, agent_id: str, message_bus=None, llm_provider: str = "mock"):
         research_config = {
@@ -218,89 +488,64 @@ class ResearchAgent(LLMAgent):
             agent_id, message_bus, llm_provider=llm_provider, llm_config=research_config
         )
 
-        # Add research-specific tasks
-        self.task_routes.update(
-            {
-                "research": self.handle_research,
-                "synthesize": self.handle_synthesize,
-                "trend_analysis": self.handle_trend_analysis,
-            }
-        )
-
-    def handle_research(self, sender: str, payload: Dict) -> None:
-        """Conduct research on a topic."""
-        topic = payload.get("topic", "")
-        depth = payload.get("depth", "moderate")
-
-        prompt = f"""
-        Please conduct {depth} research on the following topic:
-        
-        Topic: {topic}
-        
-        Provide comprehensive information, key findings, and relevant sources.
-        """
-
-        research_results = self.llm_reason(prompt)
-
-        self.send_message(
-            sender,
-            "research_complete",
-            {"topic": topic, "results": research_results, "depth": depth},
-        )
-
-    def handle_synthesize(self, sender: str, payload: Dict) -> None:
-        """Synthesize information from multiple sources."""
-        sources = payload.get("sources", [])
-        synthesis_type = payload.get("type", "comprehensive")
-
-        prompt = f"""
-        Please synthesize information from the following sources:
-        
-        Sources: {json.dumps(sources, indent=2)}
-        
-        Provide a {synthesis_type} synthesis that identifies patterns, contradictions, and insights.
-        """
 
-        synthesis = self.llm_reason(prompt)
+class CreativeAgent(LLMAgent):
+    """Specialized creative agent for content generation."""
 
-        self.send_message(
-            sender,
-            "synthesis_complete",
-            {
-                "synthesis": synthesis,
-                "synthesis_type": synthesis_type,
-                "source_count": len(sources),
+    _STORY_TMPL = (
+        "Please write a {length} {genre} story with the theme: {theme}\n\n"
+        "Make it engaging, creative, and well-structured."
+    )
+
+    _CONTENT_TMPL = (
+        "Please create {content_type} content about: {topic}\n\n"
+        "Style: {style}\n\n"
+        "Make it engaging, informative, and well-crafted."
+    )
+
+    _BRAINSTORM_TMPL = (
+        "Please brainstorm {idea_count} creative ideas about: {topic}\n\n"
+        "Provide diverse, innovative, and practical ideas."
+    )
+
+    HANDLER_SPECS = {
+        "write_story": {
+            "doc": "Write a creative story.",
+            "fields": {
+                "genre": ("genre", "general"),
+                "theme": ("theme", ""),
+                "length": ("length", "medium"),
             },
-        )
-
-    def handle_trend_analysis(self, sender: str, payload: Dict) -> None:
-        """Analyze trends in data."""
-        data = payload.get("data", {})
-        time_period = payload.get("time_period", "recent")
-
-        prompt = f"""
-        Please analyze trends in the following data over {time_period}:
-        
-        Data: {json.dumps(data, indent=2)}
-        
-        Identify patterns, trends, and potential future developments.
-        """
-
-        trend_analysis = self.llm_reason(prompt)
-
-        self.send_message(
-            sender,
-            "trend_analysis_complete",
-            {
-                "analysis": trend_analysis,
-                "time_period": time_period,
-                "data_points": len(data) if isinstance(data, (list, dict)) else 0,
+            "template": _STORY_TMPL,
+            "reply": "story_complete",
+            "result": "story",
+            "echo": {"genre": "genre", "theme": "theme", "length": "length"},
+        },
+        "create_content": {
+            "doc": "Create various types of content.",
+            "fields": {
+                "content_type": ("content_type", "article"),
+                "topic": ("topic", ""),
+                "style": ("style", "professional"),
             },
-        )
-
-
-class CreativeAgent(LLMAgent):
-    """Specialized creative agent for content generation."""
+            "template": _CONTENT_TMPL,
+            "reply": "content_complete",
+            "result": "content",
+            "echo": {
+                "content_type": "content_type",
+                "topic": "topic",
+                "style": "style",
+            },
+        },
+        "brainstorm": {
+            "doc": "Brainstorm ideas.",
+            "fields": {"topic": ("topic", ""), "idea_count": ("idea_count", 5)},
+            "template": _BRAINSTORM_TMPL,
+            "reply": "brainstorm_complete",
+            "result": "ideas",
+            "echo": {"topic": "topic", "idea_count": "idea_count"},
+        },
+    }
 
     def __init__(self, agent_id: str, message_bus=None, llm_provider: str = "mock"):
         creative_config = {
@@ -316,78 +561,3 @@ class CreativeAgent(LLMAgent):
         super().__init__(
             agent_id, message_bus, llm_provider=llm_provider, llm_config=creative_config
         )
-
-        # Add creative-specific tasks
-        self.task_routes.update(
-            {
-                "write_story": self.handle_write_story,
-                "create_content": self.handle_create_content,
-                "brainstorm": self.handle_brainstorm,
-            }
-        )
-
-    def handle_write_story(self, sender: str, payload: Dict) -> None:
-        """Write a creative story."""
-        genre = payload.get("genre", "general")
-        theme = payload.get("theme", "")
-        length = payload.get("length", "medium")
-
-        prompt = f"""
-        Please write a {length} {genre} story with the theme: {theme}
-        
-        Make it engaging, creative, and well-structured.
-        """
-
-        story = self.llm_reason(prompt)
-
-        self.send_message(
-            sender,
-            "story_complete",
-            {"story": story, "genre": genre, "theme": theme, "length": length},
-        )
-
-    def handle_create_content(self, sender: str, payload: Dict) -> None:
-        """Create various types of content."""
-        content_type = payload.get("content_type", "article")
-        topic = payload.get("topic", "")
-        style = payload.get("style", "professional")
-
-        prompt = f"""
-        Please create {content_type} content about: {topic}
-        
-        Style: {style}
-        
-        Make it engaging, informative, and well-crafted.
-        """
-
-        content = self.llm_reason(prompt)
-
-        self.send_message(
-            sender,
-            "content_complete",
-            {
-                "content": content,
-                "content_type": content_type,
-                "topic": topic,
-                "style": style,
-            },
-        )
-
-    def handle_brainstorm(self, sender: str, payload: Dict) -> None:
-        """Brainstorm ideas."""
-        topic = payload.get("topic", "")
-        idea_count = payload.get("idea_count", 5)
-
-        prompt = f"""
-        Please brainstorm {idea_count} creative ideas about: {topic}
-        
-        Provide diverse, innovative, and practical ideas.
-        """
-
-        ideas = self.llm_reason(prompt)
-
-        self.send_message(
-            sender,
-            "brainstorm_complete",
-            {"ideas": ideas, "topic": topic, "idea_count": idea_count},
-        )
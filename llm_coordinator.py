@@ -3,9 +3,16 @@ LLM-Enhanced Coordinator for Multi-Agent System
 Provides intelligent coordination between LLM agents.
 """
 
+import hashlib
 import json
-from typing import Dict, List, Any, Optional
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Iterator, List, Any, Optional, Tuple
+from agent import fault_tolerant
 from coordinator_agent import CoordinatorAgent
+from utils.llm_cache import LLMCache
 from utils.llm_interface import create_llm_interface
 from utils.logging_config import log_with_agent_id
 import logging
@@ -13,15 +20,111 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+def _is_valid_subtask(subtask: Any) -> bool:
+    """Check the fields handle_complex_task relies on in an LLM-produced subtask."""
+    return (
+        isinstance(subtask, dict)
+        and isinstance(subtask.get("agent"), str)
+        and isinstance(subtask.get("task"), str)
+        and "payload" in subtask
+        and isinstance(subtask.get("dependencies", []), list)
+        and type(subtask.get("priority", 1)) in (int, float)
+    )
+
+
+def _validate_subtasks(subtasks: List[Any]) -> List[Dict]:
+    """Drop malformed subtasks, renumbering dependencies to match.
+
+    A dependency on a dropped subtask becomes None, so its dependents are
+    reported as blocked rather than dispatched early.
+    """
+    index_map = {}
+    valid = []
+    for i, subtask in enumerate(subtasks):
+        if _is_valid_subtask(subtask):
+            index_map[i] = len(valid)
+            valid.append(subtask)
+    return [
+        {
+            **subtask,
+            "dependencies": [
+                index_map.get(dep) if type(dep) is int else None
+                for dep in subtask.get("dependencies", [])
+            ],
+        }
+        for subtask in valid
+    ]
+
+
 class LLMCoordinator(CoordinatorAgent):
     """Coordinator enhanced with LLM reasoning for intelligent task decomposition."""
 
-    def __init__(self, agent_id: str, message_bus, llm_provider: str = "mock"):
+    # Everything but the request is invariant, so it is rendered once in
+    # __init__ and the request is appended last to keep the prefix cacheable.
+    _DECOMPOSE_TMPL = (
+        "Please decompose the complex request below into subtasks for different agents.\n\n"
+        "Available agent types and their capabilities:\n"
+        "{capabilities_json}\n\n"
+        "Return a JSON array of subtasks, each with:\n"
+        "- agent: target agent type\n"
+        "- task: specific task to perform\n"
+        "- payload: data for the task\n"
+        "- priority: 1-5 (1=highest)\n"
+        "- dependencies: list of subtask indices this depends on\n\n"
+        "Request: "
+    )
+
+    _MEDIATION_TMPL = (
+        "Please analyze this conflict and suggest a resolution:\n\n"
+        "Conflict: {conflict_json}\n"
+        "Agents involved: {agents}\n\n"
+        "Provide a fair and effective resolution strategy."
+    )
+
+    _OPTIMIZATION_TMPL = (
+        "Please optimize this agent allocation plan:\n\n"
+        "Current Plan: {plan_json}\n"
+        "Constraints: {constraints_json}\n\n"
+        "Suggest optimizations for efficiency, load balancing, and resource utilization."
+    )
+
+    def __init__(
+        self,
+        agent_id: str,
+        message_bus,
+        llm_provider: str = "mock",
+        max_inflight: int = 8,
+        plan_cache_size: int = 256,
+        plan_cache_path: Optional[str] = None,
+        checkpoint_path: Optional[str] = None,
+    ):
         super().__init__(agent_id, message_bus)
 
+        # Upper bound on subtasks dispatched concurrently within one level
+        self.max_inflight = max_inflight
+
         # Initialize LLM for intelligent coordination
         self.llm = create_llm_interface(provider=llm_provider)
 
+        # Decomposition plans keyed by the request's type and data
+        self._plan_cache = LLMCache(max_entries=plan_cache_size, path=plan_cache_path)
+
+        # Append-only JSONL log of dispatched subtasks, closed by a "done"
+        # marker per request; replayed on startup so a restarted coordinator
+        # skips only subtasks of requests that were interrupted mid-dispatch.
+        self.checkpoint_path = checkpoint_path
+        self._checkpoint_lock = threading.Lock()
+        self._completed = set()
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            with open(checkpoint_path) as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        if record.get("done"):
+                            self._forget_request(record["request"])
+                        else:
+                            self._completed.add((record["request"], record["subtask"]))
+
         # Enhanced task routes
         self.task_routes.update(
             {
@@ -43,44 +146,49 @@ class LLMCoordinator(CoordinatorAgent):
             ],
             "llm_agent": ["analyze", "reason", "generate", "summarize", "plan"],
         }
+        # Serialized once: it never changes and is embedded in every decompose prompt
+        self._caps_json = json.dumps(self.agent_capabilities, separators=(",", ":"))
+        self._decompose_prefix = self._DECOMPOSE_TMPL.format_map(
+            {"capabilities_json": self._caps_json}
+        )
 
     def llm_decompose(self, request: Dict) -> List[Dict]:
         """Use LLM to intelligently decompose a complex request."""
         try:
-            request_text = json.dumps(request, indent=2)
-
-            prompt = f"""
-            Please decompose this complex request into subtasks for different agents:
-            
-            Request: {request_text}
-            
-            Available agent types and their capabilities:
-            {json.dumps(self.agent_capabilities, indent=2)}
-            
-            Return a JSON array of subtasks, each with:
-            - agent: target agent type
-            - task: specific task to perform
-            - payload: data for the task
-            - priority: 1-5 (1=highest)
-            - dependencies: list of subtask indices this depends on
-            """
+            plan_key = self._request_key(request)
+            if (plan := self._plan_cache.get(plan_key)) is not None:
+                return plan
+
+            request_text = json.dumps(request, separators=(",", ":"))
+            prompt = self._decompose_prefix + request_text
 
             response = self.llm.generate(prompt)
 
-            # Try to parse JSON response
+            # Try to parse JSON response, keeping only well-formed subtasks
             try:
-                subtasks = json.loads(response)
-                if isinstance(subtasks, list):
-                    return subtasks
+                parsed = json.loads(response)
             except json.JSONDecodeError:
-                pass
+                parsed = None
+            if isinstance(parsed, list):
+                subtasks = _validate_subtasks(parsed)
+                if len(subtasks) < len(parsed):
+                    log_with_agent_id(
+                        logger,
+                        self.agent_id,
+                        logging.WARNING,
+                        "Dropped %d malformed subtasks from LLM plan",
+                        len(parsed) - len(subtasks),
+                    )
+                if subtasks:
+                    self._plan_cache.set(plan_key, subtasks)
+                    return subtasks
 
             # Fallback to simple decomposition
             return self.fallback_decompose(request)
 
         except Exception as e:
             log_with_agent_id(
-                logger, self.agent_id, logging.ERROR, f"LLM decomposition error: {e}"
+                logger, self.agent_id, logging.ERROR, "LLM decomposition error: %s", e
             )
             return self.fallback_decompose(request)
 
@@ -127,64 +235,205 @@ class LLMCoordinator(CoordinatorAgent):
 
         return subtasks
 
+    @fault_tolerant
     def handle_complex_task(self, sender: str, payload: Dict) -> None:
         """Handle complex tasks that require multiple agents."""
         log_with_agent_id(
-            logger, self.agent_id, logging.INFO, f"Coordinating complex task: {payload}"
+            logger,
+            self.agent_id,
+            logging.INFO,
+            "Coordinating complex task: %s",
+            payload,
         )
 
         # Use LLM to decompose the task
-        subtasks = self.llm_decompose(payload)
-
-        # Execute subtasks in priority order
-        executed_tasks = []
-        for i, subtask in enumerate(subtasks):
-            agent_type = subtask["agent"]
-            task = subtask["task"]
-            task_payload = subtask["payload"]
-
-            # Check dependencies
-            dependencies = subtask.get("dependencies", [])
-            if dependencies and not all(
-                dep < len(executed_tasks) for dep in dependencies
-            ):
-                log_with_agent_id(
-                    logger,
-                    self.agent_id,
-                    logging.WARNING,
-                    f"Dependencies not met for task {i}",
-                )
-                continue
-
-            # Send task to appropriate agent
-            self.send_message(agent_type, task, task_payload)
-            executed_tasks.append(i)
+        planned = self.llm_decompose(payload)
+        subtasks = self._dedupe_subtasks(planned)
 
+        # Dispatch level by level; subtasks within a level have no
+        # dependencies on each other, so they are sent concurrently.
+        levels, blocked = self._dependency_levels(subtasks)
+        for i in blocked:
             log_with_agent_id(
                 logger,
                 self.agent_id,
-                logging.INFO,
-                f"Sent task {task} to {agent_type} with priority {subtask.get('priority', 1)}",
+                logging.WARNING,
+                "Dependencies not met for task %s",
+                i,
             )
 
+        request_key = self._request_key(payload).hex()
+        dispatch = partial(self._dispatch_subtask, request_key=request_key)
+        executed = 0
+        for level in levels:
+            level = sorted(level, key=lambda i: subtasks[i].get("priority", 1))
+            if len(level) == 1:
+                executed += dispatch(subtasks[level[0]])
+            else:
+                with ThreadPoolExecutor(
+                    max_workers=min(self.max_inflight, len(level))
+                ) as pool:
+                    executed += sum(pool.map(dispatch, (subtasks[i] for i in level)))
+
+        if self.checkpoint_path:
+            with self._checkpoint_lock:
+                self._forget_request(request_key)
+                with open(self.checkpoint_path, "a") as f:
+                    f.write(json.dumps({"request": request_key, "done": True}) + "\n")
+
         # Send completion notification
         self.send_message(
             sender,
             "coordination_complete",
             {
-                "subtasks": len(subtasks),
-                "executed": len(executed_tasks),
+                "subtasks": len(planned),
+                "deduplicated": len(planned) - len(subtasks),
+                "executed": executed,
                 "original_request": payload,
             },
         )
 
+    def _dedupe_subtasks(self, subtasks: List[Dict]) -> List[Dict]:
+        """Collapse subtasks that send the same payload to the same agent task.
+
+        Dependencies are remapped onto the surviving subtask, so anything that
+        waited on a duplicate waits on the single dispatched copy instead.
+        """
+        unique = []
+        index_map = {}
+        seen = {}
+        for i, subtask in enumerate(subtasks):
+            key = self._subtask_key(subtask)
+            if key in seen:
+                index_map[i] = seen[key]
+            else:
+                seen[key] = index_map[i] = len(unique)
+                unique.append({**subtask, "dependencies": []})
+
+        for i, subtask in enumerate(subtasks):
+            target = unique[index_map[i]]
+            for dep in subtask.get("dependencies", []):
+                # Unknown indices map to None and never become satisfied
+                mapped = index_map.get(dep) if isinstance(dep, int) else None
+                if mapped != index_map[i] and mapped not in target["dependencies"]:
+                    target["dependencies"].append(mapped)
+        return unique
+
+    def _request_key(self, request: Dict) -> bytes:
+        """Digest of the request's type and data; volatile fields are ignored."""
+        return hashlib.blake2b(
+            json.dumps(
+                {"t": request.get("type"), "d": request.get("data")},
+                sort_keys=True,
+                default=str,
+            ).encode(),
+            digest_size=16,
+        ).digest()
+
+    def _subtask_key(self, subtask: Dict) -> bytes:
+        """Digest identifying a subtask by target agent, task and payload."""
+        return hashlib.blake2b(
+            json.dumps(
+                [subtask["agent"], subtask["task"], subtask["payload"]],
+                sort_keys=True,
+                default=str,
+            ).encode(),
+            digest_size=16,
+        ).digest()
+
+    def _dependency_levels(
+        self, subtasks: List[Dict]
+    ) -> Tuple[List[List[int]], List[int]]:
+        """Group subtask indices into levels whose dependencies all sit in
+        earlier levels. Returns the levels and the indices that can never run.
+
+        Kahn's algorithm over in-degree counts: O(subtasks + dependencies).
+        """
+        count = len(subtasks)
+        indegree = [0] * count
+        dependents = [[] for _ in range(count)]
+        blocked = set()
+        for i, subtask in enumerate(subtasks):
+            for dep in subtask.get("dependencies", []):
+                if isinstance(dep, int) and 0 <= dep < count and dep != i:
+                    indegree[i] += 1
+                    dependents[dep].append(i)
+                else:
+                    blocked.add(i)
+
+        levels = []
+        level = [i for i in range(count) if not indegree[i] and i not in blocked]
+        while level:
+            levels.append(level)
+            next_level = []
+            for i in level:
+                for j in dependents[i]:
+                    indegree[j] -= 1
+                    if not indegree[j] and j not in blocked:
+                        next_level.append(j)
+            level = next_level
+
+        scheduled = {i for level in levels for i in level}
+        return levels, [i for i in range(count) if i not in scheduled]
+
+    def _forget_request(self, request_key: str) -> None:
+        """Drop checkpoint entries belonging to a finished request."""
+        self._completed = {r for r in self._completed if r[0] != request_key}
+
+    def _dispatch_subtask(self, subtask: Dict, request_key: str = None) -> bool:
+        """Send one decomposed subtask to its agent, honoring the checkpoint.
+
+        Returns False when the subtask was skipped because an interrupted run
+        of the same request already sent it.
+        """
+        agent_type = subtask["agent"]
+        task = subtask["task"]
+        record = None
+        if self.checkpoint_path:
+            record = (request_key, self._subtask_key(subtask).hex())
+            if record in self._completed:
+                log_with_agent_id(
+                    logger,
+                    self.agent_id,
+                    logging.INFO,
+                    "Skipping task %s to %s: already completed",
+                    task,
+                    agent_type,
+                )
+                return False
+
+        self.send_message(agent_type, task, subtask["payload"])
+
+        if record is not None:
+            with self._checkpoint_lock:
+                self._completed.add(record)
+                with open(self.checkpoint_path, "a") as f:
+                    f.write(
+                        json.dumps({"request": record[0], "subtask": record[1]}) + "\n"
+                    )
+        log_with_agent_id(
+            logger,
+            self.agent_id,
+            logging.INFO,
+            "Sent task %s to %s with priority %s",
+            task,
+            agent_type,
+            subtask.get("priority", 1),
+        )
+        return True
+
+    @fault_tolerant
     def handle_workflow(self, sender: str, payload: Dict) -> None:
         """Handle workflow orchestration."""
         workflow = payload.get("workflow", [])
         workflow_id = payload.get("workflow_id", "default")
 
         log_with_agent_id(
-            logger, self.agent_id, logging.INFO, f"Orchestrating workflow {workflow_id}"
+            logger,
+            self.agent_id,
+            logging.INFO,
+            "Orchestrating workflow %s",
+            workflow_id,
         )
 
         # Execute workflow steps
@@ -199,7 +448,9 @@ class LLMCoordinator(CoordinatorAgent):
                     logger,
                     self.agent_id,
                     logging.INFO,
-                    f"Workflow step: {task} -> {agent}",
+                    "Workflow step: %s -> %s",
+                    task,
+                    agent,
                 )
 
         self.send_message(
@@ -208,6 +459,7 @@ class LLMCoordinator(CoordinatorAgent):
             {"workflow_id": workflow_id, "steps": len(workflow)},
         )
 
+    @fault_tolerant
     def handle_mediation(self, sender: str, payload: Dict) -> None:
         """Mediate between conflicting agents or requests."""
         conflict = payload.get("conflict", {})
@@ -217,18 +469,17 @@ class LLMCoordinator(CoordinatorAgent):
             logger,
             self.agent_id,
             logging.INFO,
-            f"Mediating conflict between {agents_involved}",
+            "Mediating conflict between %s",
+            agents_involved,
         )
 
         # Use LLM to analyze conflict and suggest resolution
-        prompt = f"""
-        Please analyze this conflict and suggest a resolution:
-        
-        Conflict: {json.dumps(conflict, indent=2)}
-        Agents involved: {agents_involved}
-        
-        Provide a fair and effective resolution strategy.
-        """
+        prompt = self._MEDIATION_TMPL.format_map(
+            {
+                "conflict_json": json.dumps(conflict, separators=(",", ":")),
+                "agents": agents_involved,
+            }
+        )
 
         resolution = self.llm.generate(prompt)
 
@@ -250,6 +501,7 @@ class LLMCoordinator(CoordinatorAgent):
             {"resolution": resolution, "agents_involved": agents_involved},
         )
 
+    @fault_tolerant
     def handle_optimization(self, sender: str, payload: Dict) -> None:
         """Optimize agent allocation and task distribution."""
         current_plan = payload.get("plan", {})
@@ -260,14 +512,12 @@ class LLMCoordinator(CoordinatorAgent):
         )
 
         # Use LLM to optimize the plan
-        prompt = f"""
-        Please optimize this agent allocation plan:
-        
-        Current Plan: {json.dumps(current_plan, indent=2)}
-        Constraints: {json.dumps(constraints, indent=2)}
-        
-        Suggest optimizations for efficiency, load balancing, and resource utilization.
-        """
+        prompt = self._OPTIMIZATION_TMPL.format_map(
+            {
+                "plan_json": json.dumps(current_plan, separators=(",", ":")),
+                "constraints_json": json.dumps(constraints, separators=(",", ":")),
+            }
+        )
 
         optimization = self.llm.generate(prompt)
 
@@ -281,10 +531,15 @@ class LLMCoordinator(CoordinatorAgent):
             },
         )
 
+    @fault_tolerant
     def handle_request(self, sender: str, payload: Dict) -> None:
         """Enhanced request handling with LLM assistance."""
         log_with_agent_id(
-            logger, self.agent_id, logging.INFO, f"Received enhanced request: {payload}"
+            logger,
+            self.agent_id,
+            logging.INFO,
+            "Received enhanced request: %s",
+            payload,
         )
 
         # Determine if this is a complex task that needs LLM decomposition
@@ -292,21 +547,18 @@ class LLMCoordinator(CoordinatorAgent):
             self.handle_complex_task(sender, payload)
         else:
             # Use simple decomposition for basic requests
-            for subtask in self.decompose_request(payload):
-                self.send_message(subtask["agent"], subtask["task"], subtask["payload"])
+            self.send_messages(self.decompose_request(payload))
 
-    def decompose_request(self, payload: Dict) -> List[Dict]:
-        """Enhanced request decomposition."""
+    def decompose_request(self, payload: Dict) -> Iterator[Tuple[str, str, Any]]:
+        """Enhanced request decomposition, yielding (agent, task, payload)."""
         data = payload.get("data", {})
         request_type = payload.get("type", "general")
 
         if request_type == "research":
-            return [{"agent": "research_agent", "task": "research", "payload": data}]
+            yield "research_agent", "research", data
         elif request_type == "creative":
-            return [
-                {"agent": "creative_agent", "task": "create_content", "payload": data}
-            ]
+            yield "creative_agent", "create_content", data
         elif request_type == "analysis":
-            return [{"agent": "llm_agent", "task": "analyze", "payload": data}]
+            yield "llm_agent", "analyze", data
         else:
-            return [{"agent": "llm_agent", "task": "process_data", "payload": data}]
+            yield "llm_agent", "process_data", data
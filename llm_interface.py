@@ -1,5 +1,21 @@
 import os
+import asyncio
+import atexit
+import importlib.util
 import logging
+import random
+import re
+import threading
+import time
+import weakref
+from abc import ABC, abstractmethod
+from functools import partial
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from utils.llm_cache import CacheBackend, LLMCache, SemanticLLMCache, make_key
+from utils.llm_interface import estimate_tokens
 
 # Load environment variables
 load_dotenv()
@@ -7,15 +23,374 @@ load_dotenv()
 logger = logging.getLogger(__name__)
 
 
-class LLMInterface:
+class RateLimiter:
+    """Token bucket allowing `qpm` requests per minute, with bursts up to `burst`.
+
+    Usable as `async with limiter:`; each entry consumes one token and waits
+    for the bucket to refill when it is empty.
+    """
+
+    def __init__(self, qpm: float, burst: Optional[int] = None):
+        self.rate = qpm / 60
+        self.capacity = burst or max(1, int(qpm / 60))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+
+    async def acquire(self) -> None:
+        while True:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    async def __aenter__(self):
+        await self.acquire()
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+# A word as the mock matches it: keys such as "process_data" are one token
+_WORD = re.compile(r"[a-z0-9_]+")
+
+
+def _is_rate_limit(error: Exception) -> bool:
+    # Both SDKs raise a RateLimitError subclass carrying the HTTP status
+    return (
+        getattr(error, "status_code", None) == 429
+        or type(error).__name__ == "RateLimitError"
+    )
+
+
+# Event loop the *_sync wrappers run on. It lives for the whole process, so
+# the shared clients' connection pools stay bound to one open loop instead
+# of one per asyncio.run call.
+_SYNC_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_SYNC_LOOP_LOCK = threading.Lock()
+
+
+def _run_sync(coro):
+    """Run coro on the background loop and block until it completes."""
+    global _SYNC_LOOP
+    with _SYNC_LOOP_LOCK:
+        if _SYNC_LOOP is None:
+            _SYNC_LOOP = asyncio.new_event_loop()
+            threading.Thread(
+                target=_SYNC_LOOP.run_forever, name="llm-sync", daemon=True
+            ).start()
+            atexit.register(_stop_sync_loop)
+    return asyncio.run_coroutine_threadsafe(coro, _SYNC_LOOP).result()
+
+
+def _stop_sync_loop() -> None:
+    """Cancel tasks left on the background loop (e.g. batch workers) and stop it."""
+
+    async def cancel_pending():
+        tasks = asyncio.all_tasks() - {asyncio.current_task()}
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    asyncio.run_coroutine_threadsafe(cancel_pending(), _SYNC_LOOP).result(timeout=5)
+    _SYNC_LOOP.call_soon_threadsafe(_SYNC_LOOP.stop)
+
+
+# Provider clients shared across interface instances, keyed by event loop and
+# then by provider and API key: every agent on a loop reuses one connection
+# pool per backend, and no pool is reused after the loop it was opened on.
+_CLIENT_CACHE: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _http_client():
+    """httpx client tuned for many concurrent, long-running LLM requests.
+
+    HTTP/2 multiplexes concurrent requests over one connection; it needs the
+    optional h2 package (pip install httpx[http2]), otherwise HTTP/1.1 with a
+    larger keep-alive pool is used.
+    """
+    import httpx
+
+    limits = httpx.Limits(max_connections=200, max_keepalive_connections=100)
+    transport = httpx.AsyncHTTPTransport(
+        retries=2, http2=importlib.util.find_spec("h2") is not None, limits=limits
+    )
+    return httpx.AsyncClient(transport=transport, timeout=httpx.Timeout(60, connect=5))
+
+
+def _shared_client(provider: str, client_cls, api_key: Optional[str]):
+    loop = asyncio.get_running_loop()
+    clients = _CLIENT_CACHE.get(loop)
+    if clients is None:
+        clients = _CLIENT_CACHE[loop] = {}
+    client = clients.get((provider, api_key))
+    if client is None:
+        client = clients[(provider, api_key)] = client_cls(
+            api_key=api_key, http_client=_http_client()
+        )
+    return client
+
+
+# Provider name -> interface class or factory, filled in by @register
+_REGISTRY: Dict[str, Any] = {}
+
+# Configured interfaces, one per distinct (provider, kwargs) combination
+_INTERFACE_CACHE: Dict[Tuple, "LLMInterface"] = {}
+
+
+def register(name: str):
+    """Class/function decorator adding a provider to create_llm_interface."""
+
+    def decorator(factory):
+        _REGISTRY[name] = factory
+        return factory
+
+    return decorator
+
+
+class LLMInterface(ABC):
     """Abstract base class for LLM provider."""
 
+    # Context compaction: the newest turns always sent verbatim, and the size
+    # of the fixed blocks older turns are summarized in
+    _KEEP_RECENT = 4
+    _SUMMARY_BLOCK = 8
+
     def __init__(
-        self, model_name: str, temperature: float = 0.7, max_tokens: int = 1000
+        self,
+        model_name: str,
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        max_concurrent_requests: int = 32,
+        qpm: Optional[float] = None,
+        max_retries: int = 5,
+        cache: Optional[CacheBackend] = None,
+        semantic_cache: Optional[SemanticLLMCache] = None,
+        context_token_budget: Optional[int] = None,
     ):
         self.model_name = model_name
         self.temperature = temperature
         self.max_tokens = max_tokens
+        self.max_retries = max_retries
+        # Response cache, consulted only for deterministic (temperature 0) calls
+        self.cache = cache
+        # Near-duplicate single-prompt cache; requires embed() support
+        if semantic_cache is not None and type(self).embed is LLMInterface.embed:
+            raise ValueError(
+                f"{type(self).__name__} does not support embeddings, "
+                "so it cannot use a semantic cache"
+            )
+        self.semantic_cache = semantic_cache
+        # Bounds in-flight provider requests and paces them under the QPM limit.
+        # Interfaces are shared process-wide and asyncio semaphores bind to one
+        # event loop, so each loop (e.g. the *_sync loop) gets its own.
+        self.max_concurrent_requests = max_concurrent_requests
+        self._sems = weakref.WeakKeyDictionary()
+        self._limiter = RateLimiter(qpm) if qpm else None
+        # Deterministic requests currently awaiting a provider reply, by key
+        # (tasks belong to one event loop, so the table is kept per loop)
+        self._inflight = weakref.WeakKeyDictionary()
+        # Conversations estimated above this many tokens are compacted
+        self.context_token_budget = context_token_budget
+        self._summaries = LLMCache(max_entries=256)
+        self._summarizing: Dict[str, asyncio.Task] = {}
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        """The request semaphore for the running event loop."""
+        loop = asyncio.get_running_loop()
+        sem = self._sems.get(loop)
+        if sem is None:
+            sem = self._sems[loop] = asyncio.Semaphore(self.max_concurrent_requests)
+        return sem
+
+    async def _compact(self, messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """Bound a long conversation to the context token budget.
+
+        Leading system messages (the cacheable prefix) and the newest turns
+        are kept. Older turns are replaced by summaries of blocks whose
+        boundaries are chosen by turn content, not position, so a block keeps
+        its key while the window slides over the conversation; each summary
+        is computed once, in the background, and reused by later calls.
+        The still-open block before the newest turns is kept verbatim as far
+        as the budget allows; closed blocks not summarized yet are dropped.
+        """
+        budget = self.context_token_budget
+        if budget is None or (
+            sum(estimate_tokens(m["content"]) for m in messages) <= budget
+        ):
+            return messages
+
+        split = 0
+        while split < len(messages) and messages[split]["role"] == "system":
+            split += 1
+        head, body = messages[:split], messages[split:]
+        older, recent = body[: -self._KEEP_RECENT], body[-self._KEEP_RECENT :]
+
+        # A turn whose hash falls in 1/_SUMMARY_BLOCK of the key space starts
+        # a block; only blocks closed by a later boundary are complete.
+        bounds = [
+            i
+            for i, m in enumerate(older)
+            if int(make_key(role=m["role"], content=m["content"]), 16)
+            % self._SUMMARY_BLOCK
+            == 0
+        ]
+        blocks = [(older[start:end], None) for start, end in zip(bounds, bounds[1:])]
+        if bounds and bounds[0] > 0:
+            # Turns before the first boundary (the opening of the conversation,
+            # or whatever the window left of a block) form a leading block. It
+            # is keyed by the turns it ends with, which stay put while the
+            # window slides through it, so its summary is reused meanwhile.
+            end = bounds[0]
+            blocks.insert(0, (older[:end], older[end - 1 : end + 1]))
+        # The open block after the last boundary (all of older if there is
+        # none yet) has no summary; send it verbatim with the recent turns
+        recent = older[bounds[-1] if bounds else 0 :] + recent
+
+        summaries = []
+        for turns, anchor in blocks:
+            key = (
+                make_key(summarize=turns)
+                if anchor is None
+                else make_key(summarize_until=anchor)
+            )
+            summary = self._summaries.get(key)
+            if summary is not None:
+                summaries.append(summary)
+            elif key not in self._summarizing:
+                self._summarizing[key] = asyncio.get_running_loop().create_task(
+                    self._summarize(key, turns)
+                )
+
+        if summaries:
+            # Sent as conversation turns, not a system message, so the
+            # system prompt stays byte-identical for provider prefix caching
+            head = head + [
+                {
+                    "role": "user",
+                    "content": "Summary of the earlier conversation:\n\n"
+                    + "\n\n".join(summaries),
+                },
+                {"role": "assistant", "content": "Understood."},
+            ]
+        # Drop the oldest recent turns if still over budget, keeping the last
+        used = sum(estimate_tokens(m["content"]) for m in head)
+        kept = []
+        for message in reversed(recent):
+            used += estimate_tokens(message["content"])
+            if kept and used > budget:
+                break
+            kept.append(message)
+        # Start the window on a user turn, as Anthropic requires
+        while len(kept) > 1 and kept[-1]["role"] == "assistant":
+            kept.pop()
+        return head + kept[::-1]
+
+    async def _summarize(self, key: str, turns: List[Dict[str, str]]) -> None:
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in turns)
+        try:
+            summary = await self.generate(
+                "Summarize this conversation excerpt concisely, keeping facts, "
+                f"decisions and open questions:\n\n{transcript}"
+            )
+            self._summaries.set(key, summary)
+        except Exception as e:
+            logger.warning("Context summarization failed: %s", e)
+        finally:
+            self._summarizing.pop(key, None)
+
+    @property
+    def client(self):
+        """Provider client bound to the running event loop."""
+        return _shared_client(*self._client_args)
+
+    @staticmethod
+    def _text(response) -> str:
+        """Extract the reply text from a provider response."""
+        return response
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts for semantic caching; not all providers support this."""
+        raise NotImplementedError(f"{type(self).__name__} does not support embeddings")
+
+    async def _request(self, create, **params) -> str:
+        """Return the reply text for a provider request.
+
+        Deterministic (temperature 0) calls are served from and stored in the
+        response cache, and identical ones already in flight share a single
+        provider call. Single-turn prompts may also hit the semantic cache.
+        """
+        if params.get("temperature") != 0:
+            return await self._semantic_request(create, params)
+        key = make_key(**params)
+        if self.cache is not None and (cached := self.cache.get(key)) is not None:
+            return cached
+        loop = asyncio.get_running_loop()
+        inflight = self._inflight.get(loop)
+        if inflight is None:
+            inflight = self._inflight[loop] = {}
+        task = inflight.get(key)
+        if task is None:
+            task = inflight[key] = loop.create_task(
+                self._semantic_request(create, params)
+            )
+            task.add_done_callback(partial(self._settle, inflight, key))
+        # shield: a cancelled caller, the first one included, must not cancel
+        # the shared call the others are waiting on
+        return await asyncio.shield(task)
+
+    def _settle(self, inflight: Dict, key: str, task: asyncio.Task) -> None:
+        """Retire a finished shared call, caching its reply if it succeeded."""
+        inflight.pop(key, None)
+        # exception() also marks the error retrieved when no caller is left
+        if not task.cancelled() and task.exception() is None:
+            if self.cache is not None:
+                self.cache.set(key, task.result())
+
+    async def _semantic_request(self, create, params) -> str:
+        # Semantic matches are only safe for single-turn prompts: a reply to
+        # a conversation depends on more than its last message.
+        messages = params.get("messages", ())
+        if self.semantic_cache is None or len(messages) != 1 or "system" in params:
+            return await self._call(create, params)
+        # Scope by every parameter but the prompt: a match under another
+        # model, temperature, token limit or tool set is not a valid reply
+        scope = make_key(**{k: v for k, v in params.items() if k != "messages"})
+        vector = (await self.embed([messages[0]["content"]]))[0]
+        # The scan is linear in the cache size; keep it off the event loop
+        similar = await asyncio.to_thread(self.semantic_cache.search, scope, vector)
+        if similar is not None:
+            return similar
+        text = await self._call(create, params)
+        self.semantic_cache.add(scope, vector, text)
+        return text
+
+    async def _call(self, create, params) -> str:
+        """Await a provider call under the concurrency and rate limits.
+
+        Rate-limit errors are retried with exponential backoff and full jitter;
+        the sleep happens outside the semaphore so other calls can proceed.
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._semaphore():
+                    if self._limiter is not None:
+                        await self._limiter.acquire()
+                    return self._text(await create(**params))
+            except Exception as e:
+                if not _is_rate_limit(e) or attempt == self.max_retries:
+                    raise
+                delay = random.uniform(0, min(60, 2**attempt))
+                logger.warning(
+                    "Rate limited, retrying in %.2fs (attempt %d)", delay, attempt + 1
+                )
+                await asyncio.sleep(delay)
 
     @abstractmethod
     async def generate(self, prompt: str, **kwargs) -> str:
@@ -29,16 +404,40 @@ class LLMInterface:
         """Generate response with conversation context."""
         pass
 
+    async def stream(self, prompt: str, **kwargs) -> AsyncIterator[str]:
+        """Yield the response to prompt in chunks as they are generated."""
+        async for chunk in self.stream_with_context(
+            [{"role": "user", "content": prompt}], **kwargs
+        ):
+            yield chunk
+
+    async def stream_with_context(
+        self, messages: List[Dict[str, str]], **kwargs
+    ) -> AsyncIterator[str]:
+        """Yield the response in chunks; providers without streaming yield it whole."""
+        yield await self.generate_with_context(messages, **kwargs)
+
+    def generate_sync(self, prompt: str, **kwargs) -> str:
+        """Blocking wrapper around generate for callers without an event loop."""
+        return _run_sync(self.generate(prompt, **kwargs))
+
+    def generate_with_context_sync(
+        self, messages: List[Dict[str, str]], **kwargs
+    ) -> str:
+        """Blocking wrapper around generate_with_context."""
+        return _run_sync(self.generate_with_context(messages, **kwargs))
+
     def set_parameters(self, temperature: float = None, max_tokens: int = None):
         """Update generation parameters"""
         if temperature is not None:
-            logger.info(f"Setting temperature to {temperature}")
+            logger.info("Setting temperature to %s", temperature)
             self.temperature = temperature
         if max_tokens is not None:
-            logger.info(f"Setting max tokens to {max_tokens}")
+            logger.info("Setting max tokens to %s", max_tokens)
             self.max_tokens = max_tokens
 
 
+@register("openai")
 class OpenAILLMInterface(LLMInterface):
     """Open AI's API interface"""
 
@@ -47,14 +446,20 @@ class OpenAILLMInterface(LLMInterface):
         model_name: str = "gpt-4.1-nano",
         temperature: float = 0.7,
         max_tokens: int = 1000,
+        **options,
     ):
-        super().__init__(model_name, temperature, max_tokens)
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        super().__init__(model_name, temperature, max_tokens, **options)
 
         try:
             import openai
 
-            self.client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+            # Async client so concurrent agent calls overlap on the network;
+            # created per event loop on first use (see the client property)
+            self._client_args = (
+                "openai",
+                openai.AsyncOpenAI,
+                os.getenv("OPENAI_API_KEY"),
+            )
         except ImportError:
             logger.error(
                 "OpenAI is not installed. Please install it with 'pip install openai'."
@@ -63,22 +468,33 @@ class OpenAILLMInterface(LLMInterface):
                 "OpenAI is not installed. Please install it with 'pip install openai'."
             )
         except Exception as e:
-            logger.error(f"Error initializing OpenAI client: {e}")
+            logger.error("Error initializing OpenAI client: %s", e)
             raise Exception(f"Error initializing OpenAI client: {e}")
 
-    def generate(self, prompt: str, **kwargs) -> str:
+    @staticmethod
+    def _text(response) -> str:
+        return response.choices[0].message.content.strip()
+
+    async def embed(
+        self, texts: List[str], model: str = "text-embedding-3-small"
+    ) -> List[List[float]]:
+        """Embed texts in a single request."""
+        response = await self.client.embeddings.create(model=model, input=texts)
+        return [item.embedding for item in response.data]
+
+    async def generate(self, prompt: str, **kwargs) -> str:
         """Generate text response using OpenAI."""
         try:
-            response = self.client.chat.completions.create(
+            return await self._request(
+                self.client.chat.completions.create,
                 model=self.model_name,
                 messages=[{"role": "user", "content": prompt}],
                 temperature=self.temperature,
                 max_tokens=self.max_tokens,
                 **kwargs,
             )
-            return response.choices[0].message.content.strip()
         except Exception as e:
-            logger.error(f"Error generating text: {e}")
+            logger.error("Error generating text: %s", e)
             raise Exception(f"Error generating text: {e}")
 
     async def generate_with_context(
@@ -86,19 +502,45 @@ class OpenAILLMInterface(LLMInterface):
     ) -> str:
         """Generate response with conversation context."""
         try:
-            response = self.client.chat.completions.create(
+            messages = await self._compact(messages)
+            return await self._request(
+                self.client.chat.completions.create,
                 model=self.model_name,
                 messages=messages,
                 temperature=self.temperature,
                 max_tokens=self.max_tokens,
                 **kwargs,
             )
-            return response.choices[0].message.content.strip()
         except Exception as e:
-            logger.error(f"Error generating text with context: {e}")
+            logger.error("Error generating text with context: %s", e)
             raise Exception(f"Error generating text with context: {e}")
 
+    async def stream_with_context(
+        self, messages: List[Dict[str, str]], **kwargs
+    ) -> AsyncIterator[str]:
+        """Stream response chunks as the model produces them."""
+        try:
+            messages = await self._compact(messages)
+            async with self._semaphore():
+                if self._limiter is not None:
+                    await self._limiter.acquire()
+                response = await self.client.chat.completions.create(
+                    model=self.model_name,
+                    messages=messages,
+                    temperature=self.temperature,
+                    max_tokens=self.max_tokens,
+                    stream=True,
+                    **kwargs,
+                )
+                async for chunk in response:
+                    if chunk.choices and (content := chunk.choices[0].delta.content):
+                        yield content
+        except Exception as e:
+            logger.error("Error streaming text with context: %s", e)
+            raise Exception(f"Error streaming text with context: {e}")
+
 
+@register("anthropic")
 class AnthropicLLMInterface(LLMInterface):
     """Anthropic's API interface"""
 
@@ -107,14 +549,20 @@ class AnthropicLLMInterface(LLMInterface):
         model_name: str = "claude-3-5-sonnet-20240620",
         temperature: float = 0.7,
         max_tokens: int = 1000,
+        **options,
     ):
-        super().__init__(model_name, temperature, max_tokens)
-        self.client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+        super().__init__(model_name, temperature, max_tokens, **options)
 
         try:
             import anthropic
 
-            self.client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+            # Async client so concurrent agent calls overlap on the network;
+            # created per event loop on first use (see the client property)
+            self._client_args = (
+                "anthropic",
+                anthropic.AsyncAnthropic,
+                os.getenv("ANTHROPIC_API_KEY"),
+            )
         except ImportError:
             logger.error(
                 "Anthropic is not installed. Please install it with 'pip install anthropic'."
@@ -123,22 +571,63 @@ class AnthropicLLMInterface(LLMInterface):
                 "Anthropic is not installed. Please install it with 'pip install anthropic'."
             )
         except Exception as e:
-            logger.error(f"Error initializing Anthropic client: {e}")
+            logger.error("Error initializing Anthropic client: %s", e)
             raise Exception(f"Error initializing Anthropic client: {e}")
 
-    def generate(self, prompt: str, **kwargs) -> str:
+    @staticmethod
+    def _split_system(
+        messages: List[Dict[str, str]],
+    ) -> Tuple[str, List[Dict[str, str]]]:
+        """Anthropic takes the system prompt as a parameter, not a message."""
+        system = "\n\n".join(m["content"] for m in messages if m["role"] == "system")
+        return system, [m for m in messages if m["role"] != "system"]
+
+    @staticmethod
+    def _mark_cacheable(
+        system: str, messages: List[Dict[str, str]]
+    ) -> Tuple[List[Dict], List[Dict]]:
+        """Add prompt-cache breakpoints after the system prompt and the history.
+
+        Callers only ever append to the conversation, so everything before the
+        newest message is a prefix Anthropic can serve from its cache.
+        """
+        ephemeral = {"type": "ephemeral"}
+        system_blocks = [{"type": "text", "text": system, "cache_control": ephemeral}]
+        if len(messages) > 1 and isinstance(messages[-2]["content"], str):
+            history = messages[-2]
+            messages = [
+                *messages[:-2],
+                {
+                    "role": history["role"],
+                    "content": [
+                        {
+                            "type": "text",
+                            "text": history["content"],
+                            "cache_control": ephemeral,
+                        }
+                    ],
+                },
+                messages[-1],
+            ]
+        return system_blocks, messages
+
+    @staticmethod
+    def _text(response) -> str:
+        return response.content[0].text.strip()
+
+    async def generate(self, prompt: str, **kwargs) -> str:
         """Generate text response using Anthropic."""
         try:
-            response = self.client.messages.create(
+            return await self._request(
+                self.client.messages.create,
                 model=self.model_name,
                 messages=[{"role": "user", "content": prompt}],
                 temperature=self.temperature,
                 max_tokens=self.max_tokens,
                 **kwargs,
             )
-            return response.choices[0].message.content.strip()
         except Exception as e:
-            logger.error(f"Error generating text: {e}")
+            logger.error("Error generating text: %s", e)
             raise Exception(f"Error generating text: {e}")
 
     async def generate_with_context(
@@ -146,68 +635,215 @@ class AnthropicLLMInterface(LLMInterface):
     ) -> str:
         """Generate response with conversation context."""
         try:
-            response = self.client.messages.create(
+            system, messages = self._split_system(await self._compact(messages))
+            if system:
+                kwargs["system"], messages = self._mark_cacheable(system, messages)
+            return await self._request(
+                self.client.messages.create,
                 model=self.model_name,
                 messages=messages,
                 temperature=self.temperature,
                 max_tokens=self.max_tokens,
                 **kwargs,
             )
-            return response.choices[0].message.content.strip()
         except Exception as e:
-            logger.error(f"Error generating text with context: {e}")
+            logger.error("Error generating text with context: %s", e)
             raise Exception(f"Error generating text with context: {e}")
 
+    async def stream_with_context(
+        self, messages: List[Dict[str, str]], **kwargs
+    ) -> AsyncIterator[str]:
+        """Stream response text as the model produces it."""
+        try:
+            system, messages = self._split_system(await self._compact(messages))
+            if system:
+                kwargs["system"], messages = self._mark_cacheable(system, messages)
+            async with self._semaphore():
+                if self._limiter is not None:
+                    await self._limiter.acquire()
+                async with self.client.messages.stream(
+                    model=self.model_name,
+                    messages=messages,
+                    temperature=self.temperature,
+                    max_tokens=self.max_tokens,
+                    **kwargs,
+                ) as stream:
+                    async for text in stream.text_stream:
+                        yield text
+        except Exception as e:
+            logger.error("Error streaming text with context: %s", e)
+            raise Exception(f"Error streaming text with context: {e}")
+
 
+@register("mock")
 class MockLLMInterface(LLMInterface):
     def __init__(
         self,
         model_name: str = "mock-model",
         temperature: float = 0.7,
         max_tokens: int = 1000,
+        **options,
     ):
-        super().__init__(model_name, temperature, max_tokens)
+        super().__init__(model_name, temperature, max_tokens, **options)
         self.responses = {
             "ping": "I'm here!",
             "process_data": "Data processed successfully!",
             "analyze": "Based on my analysis, the data is good!",
             "default": "I understand your request, and I will help you.",
         }
+        self._priority = {key: i for i, key in enumerate(self.responses)}
+        # Single-word keys are matched as whole tokens: one tokenizing pass
+        # and a set intersection. Otherwise all keys are compiled into one
+        # alternation so the prompt is still scanned once in C.
+        if all(_WORD.fullmatch(key) for key in self.responses):
+            self._keyset = frozenset(self.responses)
+            self._pattern = None
+        else:
+            self._keyset = None
+            self._pattern = re.compile(
+                "|".join(
+                    re.escape(key)
+                    for key in sorted(self.responses, key=len, reverse=True)
+                )
+            )
 
-    def generate(self, prompt: str, **kwargs) -> str:
-        """Generate mock response based on prompt content."""
-        prompt_lower = prompt.lower()
-
-        for key, response in self.responses.items():
-            if key in prompt_lower:
-                return response
+    def _respond(self, text: str) -> str:
+        text = text.lower()
+        if self._keyset is not None:
+            matched = self._keyset.intersection(_WORD.findall(text))
+        else:
+            matched = {m.group() for m in self._pattern.finditer(text)}
+        if not matched:
+            return self.responses["default"]
+        # Several keywords present: the earliest in responses wins
+        return self.responses[min(matched, key=self._priority.__getitem__)]
 
-        return self.responses["default"]
+    async def generate(self, prompt: str, **kwargs) -> str:
+        """Generate mock response based on prompt content."""
+        return self._respond(prompt)
 
-    def generate_with_context(self, messages: List[Dict[str, str]], **kwargs) -> str:
+    async def generate_with_context(
+        self, messages: List[Dict[str, str]], **kwargs
+    ) -> str:
         """Generate mock response with context."""
         if not messages:
             return self.responses["default"]
+        return self._respond(messages[-1].get("content", ""))
+
+
+class BatchingLLMInterface(LLMInterface):
+    """Coalesces concurrent requests into micro-batches for another interface.
+
+    Requests arriving within flush_ms of each other (up to batch_size) are
+    dispatched together with asyncio.gather, so bursts from many agents go
+    out as one wave of in-flight calls instead of trickling through.
+    """
+
+    def __init__(
+        self, inner: LLMInterface, batch_size: int = 32, flush_ms: float = 8.0
+    ):
+        super().__init__(inner.model_name, inner.temperature, inner.max_tokens)
+        self.inner = inner
+        self.batch_size = batch_size
+        self.flush = flush_ms / 1000
+        self._queue = None
+        self._worker = None
+        self._loop = None
+        # Strong references to running batches; the loop only keeps weak ones
+        self._batches = set()
+
+    async def generate(self, prompt: str, **kwargs) -> str:
+        return await self._submit(self.inner.generate, prompt, kwargs)
+
+    async def generate_with_context(
+        self, messages: List[Dict[str, str]], **kwargs
+    ) -> str:
+        return await self._submit(self.inner.generate_with_context, messages, kwargs)
+
+    async def stream_with_context(
+        self, messages: List[Dict[str, str]], **kwargs
+    ) -> AsyncIterator[str]:
+        # Streams are consumed incrementally, so they bypass the batch window
+        async for chunk in self.inner.stream_with_context(messages, **kwargs):
+            yield chunk
+
+    def set_parameters(self, temperature: float = None, max_tokens: int = None):
+        super().set_parameters(temperature, max_tokens)
+        self.inner.set_parameters(temperature, max_tokens)
+
+    async def _submit(self, call, arg, kwargs):
+        loop = asyncio.get_running_loop()
+        # The drain task belongs to one event loop; start a new one if the
+        # caller is on a different loop (e.g. successive asyncio.run calls).
+        if self._loop is not loop or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._drain())
+        future = loop.create_future()
+        self._queue.put_nowait((call, arg, kwargs, future))
+        return await future
+
+    async def _drain(self):
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.flush
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Run the batch as its own task so the next window starts filling
+            task = loop.create_task(self._run(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    @staticmethod
+    async def _run(batch):
+        results = await asyncio.gather(
+            *(call(arg, **kwargs) for call, arg, kwargs, _ in batch),
+            return_exceptions=True,
+        )
+        for (_, _, _, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
 
-        last_message = messages[-1].get("content", "").lower()
-        for key, response in self.responses.items():
-            if key in last_message:
-                return response
 
-        return self.responses["default"]
+@register("openai_batched")
+def _openai_batched(
+    batch_size: int = 32, flush_ms: float = 8.0, **kwargs
+) -> BatchingLLMInterface:
+    return BatchingLLMInterface(
+        OpenAILLMInterface(**kwargs), batch_size=batch_size, flush_ms=flush_ms
+    )
 
 
 def create_llm_interface(provider: str = "mock", **kwargs) -> LLMInterface:
-    """Factory function to create LLM interface."""
-    providers = {
-        "openai": OpenAIInterface,
-        "anthropic": AnthropicInterface,
-        "mock": MockLLMInterface,
-    }
-
-    if provider not in providers:
+    """Return the shared interface for this provider and configuration.
+
+    Agents configured alike get the same instance (and so the same client);
+    note that set_parameters on it is seen by all of them.
+    """
+    if provider not in _REGISTRY:
         raise ValueError(
-            f"Unknown LLM provider: {provider}. Available: {list(providers.keys())}"
+            f"Unknown LLM provider: {provider}. Available: {list(_REGISTRY.keys())}"
         )
 
-    return providers[provider](**kwargs)
+    try:
+        key = (provider, tuple(sorted(kwargs.items())))
+        hash(key)
+    except TypeError:
+        # Unhashable options (e.g. a list) cannot be cached on
+        return _REGISTRY[provider](**kwargs)
+    interface = _INTERFACE_CACHE.get(key)
+    if interface is None:
+        interface = _INTERFACE_CACHE[key] = _REGISTRY[provider](**kwargs)
+    return interface
@@ -1,23 +1,129 @@
+import asyncio
+import weakref
+
 from utils.logging_config import setup_logger
 
 logger = setup_logger(__name__)
 
 
+class Message:
+    __slots__ = ("sender", "recipient", "task", "payload")
+
+    def __init__(self, sender, recipient, task, payload):
+        self.sender = sender
+        self.recipient = recipient
+        self.task = task
+        self.payload = payload
+
+    def __repr__(self):
+        return (
+            f"Message(sender={self.sender!r}, recipient={self.recipient!r}, "
+            f"task={self.task!r}, payload={self.payload!r})"
+        )
+
+
 class MessageBus:
-    def __init__(self):
+    def __init__(self, max_in_flight=32):
         self.agents = {}
+        # Agent ids are interned strings with cached hashes, so one dict probe
+        # is already the cheapest id -> agent lookup; bind it once.
+        self._lookup = self.agents.get
+        # Bounds agents handling messages concurrently via the async methods.
+        # asyncio semaphores bind to one event loop, so each loop gets its own.
+        self.max_in_flight = max_in_flight
+        self._in_flight = weakref.WeakKeyDictionary()
 
     def register(self, agent):
         self.agents[agent.agent_id] = agent
 
     def deliver(self, message):
-        if agent := self.agents.get(message.get("recipient")):
+        recipient = (
+            message.recipient
+            if isinstance(message, Message)
+            else message.get("recipient")
+        )
+        if agent := self._lookup(recipient):
             agent.receive_message(message)
         else:
-            logger.warning(f"Unknown recipient: {message.get('recipient')}")
+            logger.warning("Unknown recipient: %s", recipient)
+
+    def deliver_many(self, messages):
+        # Delivery is in-process (no socket writes to coalesce), so batching
+        # saves the per-message table lookup and hands each consecutive run
+        # of messages for the same recipient over in one receive_messages call.
+        lookup = self._lookup
+        run, run_recipient = [], None
+        for message in messages:
+            recipient = (
+                message.recipient
+                if isinstance(message, Message)
+                else message.get("recipient")
+            )
+            if run and recipient != run_recipient:
+                self._deliver_run(lookup(run_recipient), run_recipient, run)
+                run = []
+            run.append(message)
+            run_recipient = recipient
+        if run:
+            self._deliver_run(lookup(run_recipient), run_recipient, run)
+
+    def _deliver_run(self, agent, recipient, messages):
+        if agent:
+            agent.receive_messages(messages)
+        else:
+            for _ in messages:
+                logger.warning("Unknown recipient: %s", recipient)
 
     def broadcast(self, message):
-        sender = message.get("sender")
+        # Every agent receives the same message object with its own id passed
+        # alongside, rather than a per-recipient copy; receivers must not
+        # mutate it.
+        sender = (
+            message.sender if isinstance(message, Message) else message.get("sender")
+        )
         for agent_id, agent in self.agents.items():
             if agent_id != sender:
-                agent.receive_message({**message, "recipient": agent_id})
+                agent.receive_message(message, agent_id)
+
+    async def deliver_async(self, message):
+        recipient = (
+            message.recipient
+            if isinstance(message, Message)
+            else message.get("recipient")
+        )
+        if agent := self._lookup(recipient):
+            await self._dispatch(agent, message, recipient)
+        else:
+            logger.warning("Unknown recipient: %s", recipient)
+
+    async def broadcast_async(self, message):
+        # Agent handlers block on LLM calls, so each recipient runs in a worker
+        # thread and the broadcast takes as long as the slowest agent rather
+        # than the sum of all of them.
+        sender = (
+            message.sender if isinstance(message, Message) else message.get("sender")
+        )
+        recipients = [
+            (agent_id, agent)
+            for agent_id, agent in self.agents.items()
+            if agent_id != sender
+        ]
+        results = await asyncio.gather(
+            *(
+                self._dispatch(agent, message, agent_id)
+                for agent_id, agent in recipients
+            ),
+            return_exceptions=True,
+        )
+        # One failing agent is logged without aborting the rest of the fan-out
+        for (agent_id, _), result in zip(recipients, results):
+            if isinstance(result, Exception):
+                logger.error("Broadcast to %s failed: %s", agent_id, result)
+
+    async def _dispatch(self, agent, message, recipient):
+        loop = asyncio.get_running_loop()
+        in_flight = self._in_flight.get(loop)
+        if in_flight is None:
+            in_flight = self._in_flight[loop] = asyncio.Semaphore(self.max_in_flight)
+        async with in_flight:
+            await asyncio.to_thread(agent.receive_message, message, recipient)
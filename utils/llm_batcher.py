@@ -0,0 +1,65 @@
+"""
+Request coalescing for LLM calls.
+Groups concurrent generate_with_context calls into a single generate_batch call.
+"""
+
+import threading
+from concurrent.futures import Future
+from typing import Dict, List
+
+from utils.llm_interface import LLMInterface
+
+
+class LLMBatcher:
+    """Collect requests for a short window, then send them as one batch.
+
+    submit() blocks the calling thread until its own response is ready, so
+    callers keep a synchronous API while concurrent callers share a batch.
+    """
+
+    def __init__(self, llm: LLMInterface, window_ms: float = 5.0, max_batch: int = 32):
+        self.llm = llm
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._pending = []
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def submit(self, messages: List[Dict[str, str]]) -> str:
+        """Queue a conversation for the next batch and wait for its response."""
+        future = Future()
+        batch = None
+        with self._lock:
+            self._pending.append((messages, future))
+            if len(self._pending) >= self.max_batch:
+                batch = self._take()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.window, self._flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if batch:
+            self._run(batch)
+        return future.result()
+
+    def _take(self):
+        batch, self._pending = self._pending, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def _flush(self):
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._run(batch)
+
+    def _run(self, batch):
+        try:
+            responses = self.llm.generate_batch([messages for messages, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), response in zip(batch, responses):
+            future.set_result(response)
@@ -0,0 +1,189 @@
+"""
+Response caching for LLM calls.
+Lets agents skip provider round-trips for prompts they have already answered.
+"""
+
+import hashlib
+import json
+import math
+import operator
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, List, Optional, Protocol, Sequence
+
+
+class CacheBackend(Protocol):
+    """Interface expected of response caches; LLMCache implements it.
+
+    Other stores (e.g. Redis) can be plugged in by providing these methods.
+    """
+
+    def get(self, key: Hashable) -> Optional[Any]: ...
+
+    def set(self, key: Hashable, value: Any) -> None: ...
+
+    def clear(self) -> None: ...
+
+
+def make_key(**request: Any) -> str:
+    """Content hash of a provider request (model, messages, temperature, ...)."""
+    return hashlib.sha256(
+        json.dumps(request, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+class LLMCache:
+    """Bounded LRU cache for LLM responses with optional expiry.
+
+    With a path, entries are also written through to a SQLite file and read
+    back on a miss, so cached responses survive restarts. Persisted keys must
+    be bytes or str and values JSON-serializable.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl: Optional[float] = None,
+        path: Optional[str] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache "
+                "(key BLOB PRIMARY KEY, value TEXT, ts REAL)"
+            )
+            self._db.commit()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._db is not None:
+                entry = self._load(key)
+            if entry is None:
+                return None
+            value, stored_at = entry
+            if self.ttl is not None and time.time() - stored_at > self.ttl:
+                self._entries.pop(key, None)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store value under key, evicting the least recently used entry."""
+        stored_at = time.time()
+        with self._lock:
+            self._remember(key, value, stored_at)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?)",
+                    (key, json.dumps(value), stored_at),
+                )
+                self._db.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM llm_cache")
+                self._db.commit()
+
+    def _remember(self, key, value, stored_at):
+        self._entries[key] = (value, stored_at)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _load(self, key):
+        row = self._db.execute(
+            "SELECT value, ts FROM llm_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, stored_at = json.loads(row[0]), row[1]
+        self._remember(key, value, stored_at)
+        return value, stored_at
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SemanticLLMCache:
+    """Reuses responses for prompts whose embeddings are close to a prior one.
+
+    Vectors are normalized on insert so cosine similarity is a dot product;
+    lookups scan every entry, so the default bound is kept to a few hundred.
+    Entries are scoped by an opaque key (callers derive it from the model and
+    request parameters) and evicted LRU. With a path, the cache is loaded
+    from and saved to a JSON file.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.92,
+        max_entries: int = 512,
+        path: Optional[str] = None,
+    ):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.path = path
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            with open(path) as f:
+                for scope, vector, response in json.load(f):
+                    self._add(scope, vector, response)
+
+    def search(self, scope: str, vector: Sequence[float]) -> Optional[Any]:
+        """Return the response of the most similar entry above the threshold."""
+        query = _normalize(vector)
+        with self._lock:
+            best_id, best_score = None, self.threshold
+            for entry_id, (entry_scope, entry_vector, _) in self._entries.items():
+                if entry_scope != scope:
+                    continue
+                score = sum(map(operator.mul, query, entry_vector))
+                if score >= best_score:
+                    best_id, best_score = entry_id, score
+            if best_id is None:
+                return None
+            self._entries.move_to_end(best_id)
+            return self._entries[best_id][2]
+
+    def add(self, scope: str, vector: Sequence[float], response: Any) -> None:
+        with self._lock:
+            self._add(scope, _normalize(vector), response)
+
+    def save(self) -> None:
+        """Write the entries to the cache's path."""
+        with self._lock:
+            entries = [list(entry) for entry in self._entries.values()]
+        with open(self.path, "w") as f:
+            json.dump(entries, f)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _add(self, scope, vector, response):
+        self._entries[self._next_id] = (scope, vector, response)
+        self._next_id += 1
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _normalize(vector: Sequence[float]) -> List[float]:
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
@@ -5,8 +5,10 @@ Provides a unified interface for different LLM providers.
 
 import os
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, Optional, Any
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -15,6 +17,23 @@ load_dotenv()
 logger = logging.getLogger(__name__)
 
 
+def estimate_tokens(text: str) -> int:
+    """Approximate token count for budgeting (~4 characters per token).
+
+    Provider tokenizers differ and none is a dependency here; a length-based
+    estimate is O(1) and close enough to keep prompts under a budget.
+    """
+    return (len(text) + 3) // 4
+
+
+class ErrorResponse(str):
+    """Reply text reporting a failed provider call instead of a model answer.
+
+    Interfaces return failures as text so handlers keep working; callers that
+    store replies (e.g. response caches) check for this type and skip them.
+    """
+
+
 class LLMInterface(ABC):
     """Abstract base class for LLM providers."""
 
@@ -33,6 +52,14 @@ class LLMInterface(ABC):
         """Generate response with conversation context."""
         pass
 
+    def stream(self, messages: List[Dict[str, str]], **kwargs) -> Iterator[str]:
+        """Yield the response in chunks; providers without streaming yield it whole."""
+        yield self.generate_with_context(messages, **kwargs)
+
+    def generate_batch(self, batch: List[List[Dict[str, str]]], **kwargs) -> List[str]:
+        """Generate one response per conversation, in the same order."""
+        return [self.generate_with_context(messages, **kwargs) for messages in batch]
+
     def set_parameters(self, temperature: float = None, max_tokens: int = None):
         """Update generation parameters."""
         if temperature is not None:
@@ -56,28 +83,53 @@ class MockLLMInterface(LLMInterface):
             "plan": "I've created a detailed plan to achieve your goal.",
             "default": "I understand your request and will help you with that.",
         }
+        # Keyword table in match-priority order, built once rather than
+        # walking the responses dict (including "default") on every call
+        self._keywords = tuple(
+            (key, response)
+            for key, response in self.responses.items()
+            if key != "default"
+        )
+        self._default = self.responses["default"]
 
-    def generate(self, prompt: str, **kwargs) -> str:
-        """Generate mock response based on prompt content."""
-        prompt_lower = prompt.lower()
-
-        for key, response in self.responses.items():
-            if key in prompt_lower:
+    def _respond(self, text: str) -> str:
+        text = text.lower()
+        for key, response in self._keywords:
+            if key in text:
                 return response
+        return self._default
 
-        return self.responses["default"]
+    def generate(self, prompt: str, **kwargs) -> str:
+        """Generate mock response based on prompt content."""
+        return self._respond(prompt)
 
     def generate_with_context(self, messages: List[Dict[str, str]], **kwargs) -> str:
         """Generate mock response with context."""
         if not messages:
-            return self.responses["default"]
+            return self._default
+        return self._respond(messages[-1].get("content", ""))
 
-        last_message = messages[-1].get("content", "").lower()
-        for key, response in self.responses.items():
-            if key in last_message:
-                return response
 
-        return self.responses["default"]
+# One OpenAI client per API key, shared by every interface instance so all
+# agents reuse the client's pooled keep-alive connections instead of each
+# opening its own TLS sessions.
+_OPENAI_CLIENTS: Dict[Optional[str], Any] = {}
+_OPENAI_CLIENTS_LOCK = threading.Lock()
+
+# Threads issuing a batch's requests concurrently, shared by every batch
+_BATCH_POOL = ThreadPoolExecutor(
+    max_workers=int(os.getenv("LLM_BATCH_POOL", 32)), thread_name_prefix="llm-batch"
+)
+
+
+def _shared_openai_client(api_key: Optional[str]):
+    import openai
+
+    with _OPENAI_CLIENTS_LOCK:
+        client = _OPENAI_CLIENTS.get(api_key)
+        if client is None:
+            client = _OPENAI_CLIENTS[api_key] = openai.OpenAI(api_key=api_key)
+        return client
 
 
 class OpenAIInterface(LLMInterface):
@@ -86,9 +138,7 @@ class OpenAIInterface(LLMInterface):
     def __init__(self, model_name: str = "gpt-3.5-turbo", temperature: float = 0.7):
         super().__init__(model_name, temperature)
         try:
-            import openai
-
-            self.client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+            self.client = _shared_openai_client(os.getenv("OPENAI_API_KEY"))
         except ImportError:
             raise ImportError("OpenAI package not installed. Run: pip install openai")
         except Exception as e:
@@ -106,8 +156,8 @@ class OpenAIInterface(LLMInterface):
             )
             return response.choices[0].message.content
         except Exception as e:
-            logger.error(f"OpenAI API error: {e}")
-            return f"Error generating response: {e}"
+            logger.error("OpenAI API error: %s", e)
+            return ErrorResponse(f"Error generating response: {e}")
 
     def generate_with_context(self, messages: List[Dict[str, str]], **kwargs) -> str:
         """Generate response with conversation context."""
@@ -121,8 +171,34 @@ class OpenAIInterface(LLMInterface):
             )
             return response.choices[0].message.content
         except Exception as e:
-            logger.error(f"OpenAI API error: {e}")
-            return f"Error generating response: {e}"
+            logger.error("OpenAI API error: %s", e)
+            return ErrorResponse(f"Error generating response: {e}")
+
+    def generate_batch(self, batch: List[List[Dict[str, str]]], **kwargs) -> List[str]:
+        """Issue the batch's requests concurrently over the shared client."""
+        if len(batch) <= 1:
+            return super().generate_batch(batch, **kwargs)
+        return list(
+            _BATCH_POOL.map(lambda m: self.generate_with_context(m, **kwargs), batch)
+        )
+
+    def stream(self, messages: List[Dict[str, str]], **kwargs) -> Iterator[str]:
+        """Stream response chunks as the model produces them."""
+        try:
+            response = self.client.chat.completions.create(
+                model=self.model_name,
+                messages=messages,
+                temperature=self.temperature,
+                max_tokens=self.max_tokens,
+                stream=True,
+                **kwargs,
+            )
+            for chunk in response:
+                if chunk.choices and (content := chunk.choices[0].delta.content):
+                    yield content
+        except Exception as e:
+            logger.error("OpenAI API error: %s", e)
+            yield ErrorResponse(f"Error generating response: {e}")
 
 
 def create_llm_interface(provider: str = "mock", **kwargs) -> LLMInterface:
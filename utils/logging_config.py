@@ -13,5 +13,11 @@ def setup_logger(name, level=logging.INFO):
     return logger
 
 
-def log_with_agent_id(logger, agent_id, level, message):
-    logger.log(level, f"[{agent_id}] {message}")
+def log_with_agent_id(logger, agent_id, level, message, *args):
+    # %-style args are only formatted when the record is actually emitted.
+    if not logger.isEnabledFor(level):
+        return
+    if args:
+        logger.log(level, "[%s] " + message, agent_id, *args)
+    else:
+        logger.log(level, "[%s] %s", agent_id, message)